@@ -1,38 +1,16 @@
-import json
 import os
-from mysql.connector import connect
-from dotenv import load_dotenv
+import csv
+import time
+import argparse
+import tempfile
+from itertools import islice
+from json_cleaner import read_books
 
-# Load environment variables
-load_dotenv()
+COLUMNS = ['book_id', 'title', 'author', 'genre', 'publisher', 'year', 'price']
 
-# Database Credentials
-DB_HOST = os.getenv("DB_HOST")
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_NAME = os.getenv("DB_NAME")
-
-#load valid json file
-input_file = './data/task1_d_valid.json'
-
-with open(input_file,'r',encoding='utf-8') as f:
-    data = json.load(f)
-
-# Connect to mysql
-conn = connect(
-    host=DB_HOST,
-    user=DB_USER,
-    password=DB_PASS,
-    database=DB_NAME
-)
-
-cursor = conn.cursor()
-
-# Create Table
-cursor.execute(
-    '''
+CREATE_TABLE = '''
     CREATE TABLE IF NOT EXISTS books_raw(
-        id INT AUTO_INCREMENT PRIMARY KEY,
+        id {id_column},
         book_id VARCHAR(50),
         title VARCHAR(100),
         author VARCHAR(100),
@@ -42,27 +20,128 @@ cursor.execute(
         price DECIMAL(10,2)
     )
 '''
-)
 
-# Data insertion
-insert_query = '''
-    INSERT INTO books_raw (book_id,title,author,genre,publisher,year,price)
-    VAlUES (%s,%s,%s,%s,%s,%s,%s)
+INSERT_QUERY = '''
+    INSERT INTO books_raw ({columns})
+    VALUES ({placeholders})
+'''
+
+LOAD_DATA_QUERY = '''
+    LOAD DATA LOCAL INFILE %s INTO TABLE books_raw
+    FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+    LINES TERMINATED BY '\\n'
+    ({columns})
 '''
 
-for book in data:
-    cursor.execute(insert_query,(
+
+#-- connection (MySQL from .env, or a local SQLite file as a stand-in)
+
+def connect_db(sqlite_path=None, local_infile=False):
+    '''Return (connection, placeholder, id column DDL).'''
+    if sqlite_path:
+        import sqlite3
+        return sqlite3.connect(sqlite_path), '?', 'INTEGER PRIMARY KEY AUTOINCREMENT'
+
+    from mysql.connector import connect
+    from dotenv import load_dotenv
+
+    # Load environment variables
+    load_dotenv()
+    conn = connect(
+        host=os.getenv("DB_HOST"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASS"),
+        database=os.getenv("DB_NAME"),
+        allow_local_infile=local_infile
+    )
+    return conn, '%s', 'INT AUTO_INCREMENT PRIMARY KEY'
+
+
+#-- rows
+
+def book_row(book):
+    year, price = book.get('year'), book.get('price')
+    return (
         str(book.get('id')),
         book.get('title'),
         book.get('author'),
         book.get('genre'),
         book.get('publisher'),
-        int(book.get('year')),
-        float(book.get('price'))
-    ))
+        int(year) if year is not None else None,
+        float(price) if price is not None else None
+    )
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+#-- loaders
+
+def insert_batches(conn, books, placeholder, batch_size=1000):
+    '''executemany per batch, committing after each one so a failure only loses the current batch.'''
+    query = INSERT_QUERY.format(columns=','.join(COLUMNS), placeholders=','.join([placeholder] * len(COLUMNS)))
+    cursor = conn.cursor()
+    total = 0
+    for batch in batched(map(book_row, books), batch_size):
+        cursor.executemany(query, batch)
+        conn.commit()
+        total += len(batch)
+    cursor.close()
+    return total
+
+
+def load_data_infile(conn, books):
+    '''MySQL fast path: spool the rows to a temp CSV and load it server-side in one statement.'''
+    total = 0
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', encoding='utf-8', delete=False) as f:
+        writer = csv.writer(f, lineterminator='\n')
+        for row in map(book_row, books):
+            writer.writerow(['\\N' if v is None else v.replace('\\', '\\\\') if isinstance(v, str) else v
+                             for v in row])
+            total += 1
+    try:
+        cursor = conn.cursor()
+        cursor.execute(LOAD_DATA_QUERY.format(columns=','.join(COLUMNS)), (f.name,))
+        conn.commit()
+        cursor.close()
+    finally:
+        os.remove(f.name)
+    return total
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Load cleaned books into the books_raw table')
+    ap.add_argument('input', nargs='?', default='./data/task1_d.ndjson',
+                    help="cleaned NDJSON (written by json_cleaner.py), the raw .json export, "
+                         "or '-' for NDJSON on stdin (python json_cleaner.py -o - | python ingest.py -)")
+    ap.add_argument('--batch-size', type=int, default=1000, help='rows per executemany call and commit')
+    ap.add_argument('--load-data', action='store_true', help='use LOAD DATA LOCAL INFILE from a temp CSV (MySQL only)')
+    ap.add_argument('--sqlite', metavar='PATH', help='load into a local SQLite database instead of MySQL')
+    args = ap.parse_args()
+    if args.load_data and args.sqlite:
+        ap.error('--load-data needs MySQL')
+
+    conn, placeholder, id_column = connect_db(args.sqlite, local_infile=args.load_data)
+
+    # Create Table
+    cursor = conn.cursor()
+    cursor.execute(CREATE_TABLE.format(id_column=id_column))
+    cursor.close()
 
-conn.commit()
-print('Data ingested successfully.')
+    # Data insertion
+    start = time.perf_counter()
+    books = read_books(args.input)
+    if args.load_data:
+        total = load_data_infile(conn, books)
+    else:
+        total = insert_batches(conn, books, placeholder, args.batch_size)
+    elapsed = time.perf_counter() - start
 
-cursor.close()
-conn.close()
\ No newline at end of file
+    print(f'Data ingested successfully: {total} rows in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s).')
+    conn.close()
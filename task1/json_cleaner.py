@@ -1,11 +1,15 @@
 import json
 import re
 import os
+import sys
+import argparse
 # import mysql.connector
 
 #-- files
 input_file = './data/task1_d.json'
-output_file = './data/task1_d_valid.json'
+output_file = './data/task1_d.ndjson'
+
+CHUNK_SIZE = 1 << 20   # characters read per step
 
 #-- fix encoding
 
@@ -36,28 +40,99 @@ def fix_encoding(text):
         return text
 
 
-# read raw file
-with open(input_file,'r',encoding='utf-8') as file:
-    raw_data = file.read()
+#-- streaming tokenizer for the Ruby-hash export
+
+STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+
+# a whole flat hash in one match; otherwise braces are counted, complete strings are
+# skipped whole and a lone quote is a string cut off at the end of the buffer
+TOKEN = re.compile(r'\{(?:[^{}"]|' + STRING + r')*\}|' + STRING + r'|"|[{}]', re.S)
 
-# converting invalid file to valid json file using regex
-valid_json = re.sub(r':(\w+)\s*=>', r'"\1": ', raw_data)
+# :key=> and nil outside of strings
+RUBY_SYNTAX = re.compile('(' + STRING + r')|:(\w+)\s*=>|\bnil\b', re.S)
 
-# Checking if valid JSON
-data = json.loads(valid_json)
 
-# print(len(data))
+def ruby_to_json(text):
+    '''Rewrite one Ruby hash literal as JSON, leaving string contents alone.'''
+    def repl(m):
+        if m.group(1):
+            return m.group(1)
+        if m.group(2):
+            return '"' + m.group(2) + '": '
+        return 'null'
+    return RUBY_SYNTAX.sub(repl, text)
 
-for record in data:
+
+def clean_record(record):
     if 'price' in record:
         record['price'] = clean_price(record['price'])
     for field in ['author', 'title', 'publisher', 'genre']:
         if field in record:
             record[field] = fix_encoding(record[field])
+    return record
+
+
+def iter_records(f, chunk_size=CHUNK_SIZE):
+    '''Yield the cleaned top-level hashes of a `[{:k=>v, ...}, ...]` export one at a time,
+    holding only the current chunk and the record being read in memory.'''
+    buf, scan, depth, start = '', 0, 0, 0
+    for chunk in iter(lambda: f.read(chunk_size), ''):
+        buf += chunk
+        for m in TOKEN.finditer(buf, scan):
+            tok = m.group()
+            if tok == '"':
+                break   # wait for the rest of the string
+            if len(tok) > 1 and tok[0] == '{':
+                if depth == 0:
+                    yield clean_record(json.loads(ruby_to_json(tok)))
+            elif tok == '{':
+                if depth == 0:
+                    start = m.start()
+                depth += 1
+            elif tok == '}':
+                depth -= 1
+                if depth == 0:
+                    yield clean_record(json.loads(ruby_to_json(buf[start:m.end()])))
+            scan = m.end()
+        else:
+            scan = len(buf)
+
+        # drop everything before the record in progress
+        keep = start if depth else scan
+        buf, scan, start = buf[keep:], scan - keep, start - keep if depth else 0
+
+    if depth:
+        raise ValueError('unexpected end of input inside a record')
+
+
+def read_books(path):
+    '''Books from the raw Ruby-hash export (.json) or from the cleaned NDJSON ('-' for stdin).'''
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        if path.endswith('.json'):
+            yield from iter_records(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
 
-# Save final file
-with open(output_file,'w',encoding='utf-8') as f:
-    json.dump(data,f,indent=4)
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Convert the Ruby-hash book export to newline-delimited JSON')
+    ap.add_argument('input', nargs='?', default=input_file)
+    ap.add_argument('-o', '--output', default=output_file, help="NDJSON output file, '-' for stdout")
+    args = ap.parse_args()
 
-if os.path.getsize(output_file) > 0:
-    print("file saved successfully.")
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    count = 0
+    with open(args.input, 'r', encoding='utf-8') as file:
+        for record in iter_records(file):
+            out.write(json.dumps(record) + '\n')
+            count += 1
+    if out is not sys.stdout:
+        out.close()
+        if os.path.getsize(args.output) > 0:
+            print(f"file saved successfully ({count} records).")
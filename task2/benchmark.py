@@ -0,0 +1,87 @@
+import os
+import time
+import hashlib
+import argparse
+import tempfile
+import random
+
+from sha3_task2 import compute_hashes_from_folder, sorting_key, sort_hashes, CHUNK_SIZE
+from hash_cache import HashCache
+
+
+def make_tree(folder, files, max_kb, seed=0):
+    '''files random-sized files (1 KB .. max_kb KB) with random content.'''
+    rng = random.Random(seed)
+    total = 0
+    for i in range(files):
+        size = rng.randint(1, max_kb) * 1024
+        with open(os.path.join(folder, f'file_{i:06d}.data'), 'wb') as f:
+            f.write(rng.randbytes(size))
+        total += size
+    return total
+
+
+def legacy_hashes(folder_path):
+    '''The original loop: whole file in memory, one thread.'''
+    hashes = []
+    for filename in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, filename)
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, 'rb') as f:
+            hashes.append(hashlib.sha3_256(f.read()).hexdigest())
+    return hashes
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+def sort_parity(digests, seed=0):
+    '''Batch sort vs hashes.sort(key=sorting_key), with shuffled copies and repeats mixed in for ties.'''
+    rng = random.Random(seed)
+    sample = digests[:len(digests) // 20]
+    digests = digests + [''.join(rng.sample(d, len(d))) for d in sample] + sample
+    rng.shuffle(digests)
+
+    expected, t_old = timed(lambda: sorted(digests, key=sorting_key))
+    ordered, t_new = timed(sort_hashes, digests)
+    assert ordered == expected, 'sort order differs from sorting_key'
+    print(f'\nsort {len(digests):,} digests (parity OK): sorting_key {t_old:.2f}s, batch {t_new:.2f}s, '
+          f'{t_old / t_new:.1f}x')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Hashing throughput over a generated directory')
+    ap.add_argument('--files', type=int, default=5000)
+    ap.add_argument('--max-kb', type=int, default=512, help='largest generated file')
+    ap.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    ap.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    ap.add_argument('--digests', type=int, default=1_000_000, help='random digests for the sort benchmark')
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        total = make_tree(folder, args.files, args.max_kb)
+        print(f'{args.files} files, {total / 2**20:,.0f} MB, {os.cpu_count()} CPUs\n')
+
+        expected, elapsed = timed(legacy_hashes, folder)
+        print(f'{"legacy read()":<16}{elapsed:8.2f}s {total / 2**20 / elapsed:10,.0f} MB/s')
+
+        for workers in args.workers:
+            hashes, elapsed = timed(compute_hashes_from_folder, folder, workers, args.chunk_size)
+            assert hashes == expected, f'hash mismatch with {workers} workers'
+            print(f'{f"{workers} worker(s)":<16}{elapsed:8.2f}s {total / 2**20 / elapsed:10,.0f} MB/s')
+
+        # Second run over the unchanged tree is served from the digest cache
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = HashCache(os.path.join(cache_dir, 'hashes.sqlite'))
+            for label in ('cache (cold)', 'cache (warm)'):
+                hashes, elapsed = timed(compute_hashes_from_folder, folder, 1, args.chunk_size, cache)
+                assert hashes == expected, f'hash mismatch in {label}'
+                print(f'{label:<16}{elapsed:8.2f}s {total / 2**20 / elapsed:10,.0f} MB/s')
+            cache.close()
+
+    rng = random.Random(1)
+    sort_parity([rng.randbytes(32).hex() for _ in range(args.digests)])
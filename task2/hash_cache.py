@@ -0,0 +1,64 @@
+import os
+import sqlite3
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'sha3_task2', 'hashes.sqlite')
+
+
+class HashCache:
+    '''SHA3-256 digests on disk, keyed by absolute path and valid while
+    (size, mtime_ns, inode) of the file are unchanged. Paths passed in must be absolute.'''
+
+    def __init__(self, path=DEFAULT_CACHE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS hashes('
+            'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, digest TEXT)'
+        )
+        self.entries = {}
+        self.updates = []
+        self.stats = {'hits': 0, 'hashed': 0, 'mismatched': 0, 'pruned': 0}
+
+    def load(self, folder):
+        '''Read the entries for the files under folder into memory (one query per run).'''
+        prefix = os.path.join(os.path.abspath(folder), '')
+        rows = self.conn.execute(
+            'SELECT path, size, mtime_ns, inode, digest FROM hashes WHERE path >= ? AND path < ?',
+            (prefix, prefix + '\U0010ffff')
+        )
+        self.entries = {path: ((size, mtime_ns, inode), digest) for path, size, mtime_ns, inode, digest in rows}
+
+    @staticmethod
+    def file_key(st):
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def get(self, path, st):
+        entry = self.entries.get(path)
+        if entry and entry[0] == self.file_key(st):
+            return entry[1]
+        return None
+
+    def put(self, path, st, digest):
+        key = self.file_key(st)
+        entry = self.entries.get(path)
+        if entry and entry[0] == key and entry[1] != digest:
+            self.stats['mismatched'] += 1   # same size/mtime/inode, different content
+        if entry != (key, digest):
+            self.updates.append((path, *key, digest))
+        self.entries[path] = (key, digest)
+
+    def save(self, seen, walked=None):
+        '''Write new/changed digests and drop entries for files that are gone: not seen
+        although walked(path) says the walk would have listed them (default: any path).'''
+        seen = set(seen)
+        stale = [(p,) for p in self.entries if p not in seen and (walked is None or walked(p))]
+        with self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)', self.updates)
+            self.conn.executemany('DELETE FROM hashes WHERE path = ?', stale)
+        for (p,) in stale:
+            del self.entries[p]
+        self.stats['pruned'] += len(stale)
+        self.updates = []
+
+    def close(self):
+        self.conn.close()
@@ -1,6 +1,37 @@
 import hashlib
+import math
 import os
-import sys
+import argparse
+import threading
+from fnmatch import fnmatch
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from hash_cache import HashCache, DEFAULT_CACHE
+
+CHUNK_SIZE = 1 << 20   # bytes read per update()
+
+_local = threading.local()
+
+# digit + 1 for every hex character, and its prime exponents (2, 3, 5, 7, 11, 13)
+HEX_VALUE = np.zeros(256, dtype=np.uint8)
+for _ch in '0123456789abcdefABCDEF':
+    HEX_VALUE[ord(_ch)] = int(_ch, 16) + 1
+PRIMES = [2, 3, 5, 7, 11, 13]
+EXPONENTS = np.array([[0] * 6] + [[next(e for e in range(5) if v % p ** (e + 1)) for p in PRIMES]
+                                  for v in range(1, 17)], dtype=np.int16)
+LOG_PRIMES = np.log(PRIMES)
+
+# Exponent fields packed into one int64 so a row sum adds all six at once; no field
+# overflows for strings of up to MAX_PACKED_DIGITS digits
+MAX_PACKED_DIGITS = 127
+FIELD_BITS = [9, 8, 7, 7, 7, 7]
+FIELD_SHIFT = np.cumsum([0] + FIELD_BITS[:-1])
+PACKED_EXPONENTS = (EXPONENTS.astype(np.int64) << FIELD_SHIFT).sum(axis=1)
+
+# Log keys closer than this are compared with exact products (float error is ~1e-12)
+LOG_TOLERANCE = 1e-9
+SORT_BATCH = 1 << 16
 
 def sorting_key(hexdigit):
     product = 1
@@ -9,37 +40,182 @@ def sorting_key(hexdigit):
         product *= (digit + 1)
     return product
 
-def compute_hashes_from_folder(folder_path):
+def sort_order(hashes):
+    '''Indices that sort hashes like hashes.sort(key=sorting_key): by log of the product,
+    with near-ties settled by the exact integer product and equal products by position.'''
+    n = len(hashes)
+    if n == 0:
+        return np.zeros(0, dtype=np.intp)
+    width = len(hashes[0])
+    raw = ''.join(hashes).encode('ascii', 'replace')
+    if len(raw) != n * width or width > MAX_PACKED_DIGITS:
+        return np.array(sorted(range(n), key=lambda i: sorting_key(hashes[i])), dtype=np.intp)
+    digits = HEX_VALUE[np.frombuffer(raw, dtype=np.uint8).reshape(n, width)]
+    if not digits.all():
+        return np.array(sorted(range(n), key=lambda i: sorting_key(hashes[i])), dtype=np.intp)
+
+    # The product as prime exponents: exact, small, and one float log key computed the same way per row
+    packed = np.empty(n, dtype=np.int64)
+    for start in range(0, n, SORT_BATCH):
+        packed[start:start + SORT_BATCH] = PACKED_EXPONENTS[digits[start:start + SORT_BATCH]].sum(axis=1)
+    exps = (packed[:, None] >> FIELD_SHIFT) & ((1 << np.array(FIELD_BITS)) - 1)
+    log_key = sum(exps[:, j] * LOG_PRIMES[j] for j in range(len(PRIMES)))
+    order = np.argsort(log_key, kind='stable')
+
+    # Neighbours with different products but log keys too close to trust get the exact Python key
+    exps, packed = exps[order], packed[order]
+    close = np.diff(log_key[order]) <= LOG_TOLERANCE
+    unsure = close & (packed[1:] != packed[:-1])
+    if unsure.any():
+        run_id = np.concatenate([[0], np.cumsum(~close)])
+        for run in np.unique(run_id[1:][unsure]):
+            start, stop = np.searchsorted(run_id, [run, run + 1])
+            key = {i: (math.prod(p ** int(e) for p, e in zip(PRIMES, x)), i)
+                   for i, x in zip(order[start:stop], exps[start:stop])}
+            order[start:stop] = sorted(order[start:stop], key=key.get)
+    return order
+
+def sort_hashes(hashes):
+    return [hashes[i] for i in sort_order(hashes)]
+
+def hash_file(file_path, chunk_size=CHUNK_SIZE):
+    # One reusable buffer per thread, so memory per file stays at chunk_size
+    buf = getattr(_local, 'buf', None)
+    if buf is None or len(buf) != chunk_size:
+        buf = _local.buf = bytearray(chunk_size)
+    view = memoryview(buf)
+
+    file_hash = hashlib.sha3_256()
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            file_hash.update(view[:n])
+    return file_hash.hexdigest()
+
+def matches(rel_path, patterns):
+    return any(fnmatch(rel_path, pat) for pat in patterns)
+
+def in_walk(rel_path, include=(), exclude=()):
+    '''Whether walk_files with these patterns lists rel_path: neither it nor a directory
+    above it is excluded, and it is included.'''
+    parts = rel_path.split('/')
+    if exclude and any(matches('/'.join(parts[:i]), exclude) for i in range(1, len(parts) + 1)):
+        return False
+    return not include or matches(rel_path, include)
+
+def walk_files(folder_path, include=(), exclude=(), rel_dir=''):
+    '''Yield (relative_path, absolute_path, stat) for every regular file under folder_path,
+    depth-first in name order, one directory listing at a time. Paths use '/' and are
+    matched against the glob patterns; excluded directories are not entered.'''
+    with os.scandir(folder_path) as it:
+        entries = sorted(it, key=lambda e: e.name)
+
+    for entry in entries:
+        rel_path = rel_dir + entry.name
+        if exclude and matches(rel_path, exclude):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk_files(entry.path, include, exclude, rel_path + '/')
+        elif entry.is_file():
+            if include and not matches(rel_path, include):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield rel_path, entry.path, st
+
+def iter_hashes(folder_path, workers=1, chunk_size=CHUNK_SIZE, cache=None, verify=False,
+                include=(), exclude=()):
+    '''Stream (relative_path, digest) pairs in walk order. Files are hashed while the
+    walk goes on, with at most a few files per worker in flight.'''
     if not os.path.isdir(folder_path):
         raise NotADirectoryError(f'Folder not found: {folder_path}')
 
-    hashes = []
-
-    for filename in sorted(os.listdir(folder_path)):
-        file_path = os.path.join(folder_path, filename)
-
-        if not os.path.isfile(file_path):
-            continue
-
-        with open(file_path, 'rb') as f:
-            data = f.read()
-            file_hash = hashlib.sha3_256(data).hexdigest()
-            hashes.append(file_hash)
-
-    return hashes
+    folder_path = os.path.abspath(folder_path)
+    if cache is not None:
+        cache.load(folder_path)
+    seen = []   # paths still present, kept in the cache on save
+    pending = deque()
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def hashed(path, st, digest):
+        if cache is not None:
+            cache.put(path, st, digest)
+            cache.stats['hashed'] += 1
+        return digest
+
+    def finish(item):
+        rel_path, path, st, digest = item
+        if not isinstance(digest, str):
+            digest = hashed(path, st, digest.result())
+        return rel_path, digest
+
+    try:
+        for rel_path, path, st in walk_files(folder_path, include, exclude):
+            # Unchanged files (same size, mtime and inode) come from the cache unless verifying
+            digest = cache.get(path, st) if cache is not None and not verify else None
+            if digest is not None:
+                cache.stats['hits'] += 1
+            elif pool is None:
+                digest = hashed(path, st, hash_file(path, chunk_size))
+            else:
+                digest = pool.submit(hash_file, path, chunk_size)
+            pending.append((rel_path, path, st, digest))
+            if cache is not None:
+                seen.append(path)
+
+            # Hand out finished pairs in walk order; block only when too many are in flight
+            while pending and (isinstance(pending[0][3], str) or len(pending) > 4 * workers):
+                yield finish(pending.popleft())
+        while pending:
+            yield finish(pending.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    if cache is not None:
+        # a filtered run only prunes files its filters would have listed
+        prefix = os.path.join(folder_path, '')
+        cache.save(seen, lambda path: in_walk(os.path.relpath(path, prefix).replace(os.sep, '/'),
+                                              include, exclude))
+
+def compute_hashes_from_folder(folder_path, workers=1, chunk_size=CHUNK_SIZE, cache=None, verify=False,
+                               include=(), exclude=()):
+    return [digest for _, digest in iter_hashes(folder_path, workers, chunk_size, cache, verify, include, exclude)]
 
 def main():
+    ap = argparse.ArgumentParser(description='SHA3-256 of every file, sorted and combined with an email')
+    ap.add_argument('folder', nargs='?')
+    ap.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='files hashed in parallel')
+    ap.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='bytes read per update()')
+    ap.add_argument('--cache', default=DEFAULT_CACHE, help='digest cache file (SQLite)')
+    ap.add_argument('--no-cache', action='store_true', help='hash every file without reading or writing the cache')
+    ap.add_argument('--verify', action='store_true', help='rehash every file and refresh the cache')
+    ap.add_argument('--include', action='append', default=[], metavar='GLOB',
+                    help="only hash files whose relative path matches (repeatable; fnmatch, '*' also matches '/')")
+    ap.add_argument('--exclude', action='append', default=[], metavar='GLOB',
+                    help='skip files and directories whose relative path matches (repeatable)')
+    args = ap.parse_args()
+
     # --- Getting folder path from CLI or user input ---
-    if len(sys.argv) > 1:
-        folder = sys.argv[1]
+    if args.folder:
+        folder = args.folder
     else:
         folder = input('Enter folder path containing files: ').strip()
 
     # Step 1 & 2
-    hashes = compute_hashes_from_folder(folder)
+    cache = None if args.no_cache else HashCache(args.cache)
+    hashes = compute_hashes_from_folder(folder, args.workers, args.chunk_size, cache, args.verify,
+                                        args.include, args.exclude)
+    if cache is not None:
+        print('Cache: {hits} unchanged, {hashed} hashed, {pruned} pruned, {mismatched} mismatched'.format(**cache.stats))
+        cache.close()
 
     # Step 3
-    hashes.sort(key=sorting_key)
+    hashes = sort_hashes(hashes)
 
     # --- Ask for email (task requirement) ---
     email = input("Enter your email: ").strip().lower()
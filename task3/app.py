@@ -1,26 +1,36 @@
-from flask import Flask, request
-from math import gcd
+from flask import Flask, Response, request, stream_with_context
+from concurrent.futures import TimeoutError
 import os
+from lcm_batch import pairs_from_json, pairs_from_lines, stream_json, stream_lines
+from lcm_math import parse_operands, guarded_lcm
 
 app = Flask(__name__)
 
-def lcm(a,b):
-    return abs(a*b)// gcd(a,b)
-
+# ?x=..&y=.. and optionally more operands as repeated z: ?x=4&y=6&z=10&z=15
+# x and y must appear exactly once: ?x=4&x=5&y=6 is NaN
 @app.get('/hire_manishrai_gmail_com')
 def compute_lcm():
-    x = request.args.get('x')
-    y = request.args.get('y')
+    values = parse_operands(request.args.getlist('x'), request.args.getlist('y'), request.args.getlist('z'))
+    if values is None:
+        return 'NaN'
 
     try:
-        x = int(x)
-        y = int(y)
-        if x < 0 or y < 0:
-            return 'NaN'
-    except:
-        return 'NaN'
-    
-    return str(lcm(x,y))
+        return guarded_lcm(values)
+    except TimeoutError:
+        return Response('lcm computation timed out', status=503)
+
+# Many pairs per request: a JSON array of [x, y] pairs, or one pair per line
+# (application/x-ndjson or text/plain). Results come back in order, streamed, 'NaN' for invalid entries.
+@app.post('/hire_manishrai_gmail_com/batch')
+def compute_lcm_batch():
+    if request.mimetype == 'application/json':
+        try:
+            pairs = pairs_from_json(request.get_data())
+        except ValueError:
+            return Response('expected a JSON list of [x, y] pairs', status=400)
+        return Response(stream_json(pairs), mimetype='application/json')
+
+    return Response(stream_with_context(stream_lines(pairs_from_lines(request.stream))), mimetype='text/plain')
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT',8080))
@@ -0,0 +1,91 @@
+import os
+import time
+import asyncio
+from collections import deque
+from functools import lru_cache
+from typing import List
+import numpy as np
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from lcm_math import is_heavy, lcm_text, parse_operands, guarded_lcm_async
+from lcm_batch import pairs_from_json, pairs_from_lines, stream_json, stream_lines
+
+# ASGI serving mode of app.py:
+#   python serve.py --port 8080 --workers 4      (or: uvicorn asgi_app:app)
+# Every worker process has its own cache and metrics; /stats reports the worker that answers.
+
+CACHE_SIZE = int(os.environ.get('LCM_CACHE_SIZE', 65536))
+LATENCY_WINDOW = 10000   # most recent requests kept for the percentiles
+
+app = FastAPI(title='LCM service')
+
+latencies = deque(maxlen=LATENCY_WINDOW)
+request_count = 0
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_lcm(values):
+    return lcm_text(values)
+
+
+@app.middleware('http')
+async def record_latency(request: Request, call_next):
+    global request_count
+    start = time.perf_counter()
+    response = await call_next(request)
+    latencies.append(time.perf_counter() - start)
+    request_count += 1
+    return response
+
+
+@app.get('/hire_manishrai_gmail_com', response_class=PlainTextResponse)
+async def compute_lcm(x: List[str] = Query(None), y: List[str] = Query(None), z: List[str] = Query(None)):
+    values = parse_operands(x or [], y or [], z or [])
+    if values is None:
+        return 'NaN'
+    # heavy inputs go to the compute pool and are not cached
+    if is_heavy(values):
+        try:
+            return await guarded_lcm_async(values)
+        except asyncio.TimeoutError:
+            return PlainTextResponse('lcm computation timed out', status_code=503)
+    # lcm is symmetric: (y, x) shares the cache entry of (x, y)
+    return cached_lcm(tuple(sorted(values)))
+
+
+@app.post('/hire_manishrai_gmail_com/batch')
+async def compute_lcm_batch(request: Request):
+    body = await request.body()
+    if request.headers.get('content-type', '').split(';')[0].strip() == 'application/json':
+        # a large body takes a while to decode: not on the event loop
+        try:
+            pairs = await asyncio.to_thread(pairs_from_json, body)
+        except ValueError:
+            return PlainTextResponse('expected a JSON list of [x, y] pairs', status_code=400)
+        return StreamingResponse(stream_json(pairs), media_type='application/json')
+    # sync iterators are consumed in the threadpool, line parsing included
+    return StreamingResponse(stream_lines(pairs_from_lines(body.splitlines())), media_type='text/plain')
+
+
+@app.get('/stats')
+def stats():
+    info = cached_lcm.cache_info()
+    window = np.array(latencies) * 1000
+    lookups = info.hits + info.misses
+    return {
+        'pid': os.getpid(),
+        'requests': request_count,
+        'cache': {
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': round(info.hits / lookups, 4) if lookups else None,
+        },
+        'latency_ms': {
+            'window': len(window),
+            'mean': round(float(window.mean()), 3) if len(window) else None,
+            'p50': round(float(np.percentile(window, 50)), 3) if len(window) else None,
+            'p99': round(float(np.percentile(window, 99)), 3) if len(window) else None,
+        },
+    }
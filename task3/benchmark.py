@@ -0,0 +1,89 @@
+import time
+import json
+import random
+import argparse
+from math import gcd
+from functools import reduce
+from lcm_math import lcm, lcm_many, parse_natural
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def random_number(rng, digits):
+    return rng.randrange(10 ** (digits - 1), 10 ** digits)
+
+
+def shared_factor_pairs(rng, digits, n):
+    '''Pairs with a large common factor, where dividing first pays off most.'''
+    pairs = []
+    for _ in range(n):
+        g = random_number(rng, digits // 2)
+        pairs.append((g * random_number(rng, digits - digits // 2), g * random_number(rng, digits - digits // 2)))
+    return pairs
+
+
+# PAIRS: abs(a*b)//gcd(a,b) (the old route) vs a//gcd(a,b)*b
+def bench_pairs(rng, digit_sizes, n):
+    rows = []
+    for digits in digit_sizes:
+        pairs = shared_factor_pairs(rng, digits, n)
+        old = timed(lambda: [abs(a * b) // gcd(a, b) for a, b in pairs])
+        new = timed(lambda: [lcm(a, b) for a, b in pairs])
+        assert [abs(a * b) // gcd(a, b) for a, b in pairs] == [lcm(a, b) for a, b in pairs]
+        rows.append({'digits': digits, 'pairs': n, 'product_first_s': round(old, 4),
+                     'gcd_first_s': round(new, 4), 'speedup': round(old / new, 2)})
+    return rows
+
+
+# MANY OPERANDS: pairwise tree vs left fold
+def bench_many(rng, counts, digits):
+    rows = []
+    for k in counts:
+        values = [random_number(rng, digits) for _ in range(k)]
+        fold = timed(lambda: reduce(lcm, values), repeat=1)
+        tree = timed(lambda: lcm_many(values), repeat=1)
+        assert reduce(lcm, values) == lcm_many(values)
+        rows.append({'operands': k, 'digits': digits, 'left_fold_s': round(fold, 4),
+                     'tree_s': round(tree, 4), 'speedup': round(fold / tree, 2)})
+    return rows
+
+
+# GUARD: rejecting an oversized operand vs converting it
+def bench_guard(sizes):
+    import sys
+    rows = []
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    try:
+        for digits in sizes:
+            text = '7' * digits
+            rows.append({'digits': digits,
+                         'int_s': round(timed(int, text), 5),
+                         'guard_reject_s': round(timed(parse_natural, text), 7)})
+    finally:
+        sys.set_int_max_str_digits(limit)
+    return rows
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Large-integer lcm: gcd-first vs product-first, '
+                                             'reduction tree vs left fold, cost of the size guard')
+    ap.add_argument('--pairs', type=int, default=2000, help='pairs per digit size')
+    ap.add_argument('--digits', type=int, nargs='+', default=[20, 100, 500, 1000, 4000])
+    ap.add_argument('--operands', type=int, nargs='+', default=[16, 64, 256])
+    ap.add_argument('--operand-digits', type=int, default=1000)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    print(json.dumps({
+        'pairs': bench_pairs(rng, args.digits, args.pairs),
+        'many': bench_many(rng, args.operands, args.operand_digits),
+        'guard': bench_guard([10 ** 5, 10 ** 6]),
+    }, indent=2))
@@ -0,0 +1,95 @@
+import json
+import numpy as np
+from itertools import islice
+from lcm_math import lcm, parse_natural, int_text
+
+BLOCK = 8192            # pairs computed (and streamed back) per step
+INT64_SAFE = 1 << 31    # both operands below this: the lcm fits in int64
+
+
+# PARSING (same rules as the single-pair route: natural numbers up to LCM_MAX_DIGITS, anything else is NaN)
+def parse_value(value):
+    return parse_natural(value)
+
+
+def parse_pair(pair):
+    if not isinstance(pair, (list, tuple)) or len(pair) != 2:
+        return None, None
+    return parse_value(pair[0]), parse_value(pair[1])
+
+
+def pairs_from_json(body):
+    '''[[x, y], ...] or {"pairs": [[x, y], ...]}. Integers are kept as text, so
+    parse_natural checks their length before anything converts them.'''
+    data = json.loads(body, parse_int=str)
+    if isinstance(data, dict):
+        data = data.get('pairs', [])
+    if not isinstance(data, list):
+        raise ValueError('expected a list of [x, y] pairs')
+    return data
+
+
+def pairs_from_lines(lines):
+    '''One pair per line: a JSON array `[x, y]` or `x,y` / `x y`.'''
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', 'replace')
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('['):
+            try:
+                yield json.loads(line, parse_int=str)
+            except ValueError:
+                yield None
+        else:
+            yield line.replace(',', ' ').split()
+
+
+# COMPUTE
+def lcm_block(pairs):
+    '''lcm of every pair as a string, 'NaN' for invalid entries.'''
+    parsed = [parse_pair(p) for p in pairs]
+    out = ['NaN'] * len(parsed)
+
+    small, big = [], []
+    for i, (x, y) in enumerate(parsed):
+        if x is None or y is None or (x == 0 and y == 0):
+            continue
+        (small if x < INT64_SAFE and y < INT64_SAFE else big).append(i)
+
+    # numpy for everything that fits in int64, exact Python ints for the rest
+    if small:
+        xs = np.fromiter((parsed[i][0] for i in small), dtype=np.int64, count=len(small))
+        ys = np.fromiter((parsed[i][1] for i in small), dtype=np.int64, count=len(small))
+        for i, v in zip(small, np.lcm(xs, ys).tolist()):
+            out[i] = str(v)
+    for i in big:
+        x, y = parsed[i]
+        out[i] = int_text(lcm(x, y))
+    return out
+
+
+def iter_results(pairs, block=BLOCK):
+    '''Lists of results, one per block of input pairs, so output starts before input ends.'''
+    pairs = iter(pairs)
+    while True:
+        chunk = list(islice(pairs, block))
+        if not chunk:
+            return
+        yield lcm_block(chunk)
+
+
+def stream_json(pairs, block=BLOCK):
+    '''JSON array of result strings, emitted block by block.'''
+    yield '['
+    first = True
+    for results in iter_results(pairs, block):
+        yield ('' if first else ',') + ','.join(json.dumps(r) for r in results)
+        first = False
+    yield ']'
+
+
+def stream_lines(pairs, block=BLOCK):
+    for results in iter_results(pairs, block):
+        yield '\n'.join(results) + '\n'
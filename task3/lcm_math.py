@@ -0,0 +1,141 @@
+import os
+import sys
+import asyncio
+import threading
+from contextlib import contextmanager
+from math import gcd, log2
+from concurrent.futures import ProcessPoolExecutor
+
+# Limits, overridable through the environment
+MAX_DIGITS = int(os.environ.get('LCM_MAX_DIGITS', 1000))       # per operand, checked before int()
+MAX_OPERANDS = int(os.environ.get('LCM_MAX_OPERANDS', 64))
+HEAVY_BITS = int(os.environ.get('LCM_HEAVY_BITS', 16384))      # larger inputs run in the compute pool
+TIMEOUT = float(os.environ.get('LCM_TIMEOUT', 2.0))            # seconds, for pool computations
+POOL_WORKERS = int(os.environ.get('LCM_POOL_WORKERS', 2))
+
+MAX_BITS = int(MAX_DIGITS * log2(10)) + 1
+
+# A result can have up to MAX_DIGITS * MAX_OPERANDS digits
+RESULT_DIGITS = MAX_DIGITS * MAX_OPERANDS
+
+_pool = None
+_digits_lock = threading.Lock()
+_digits_users = 0
+_digits_saved = 0
+
+
+# INT/STR DIGIT LIMIT
+@contextmanager
+def raised_digit_limit(digits=RESULT_DIGITS):
+    '''Let int()/str() handle `digits` digits while inside. The interpreter limit stays in
+    place everywhere else, so only lengths checked beforehand run unguarded; concurrent
+    users share one raise and the last one out restores the limit.'''
+    global _digits_users, _digits_saved
+    with _digits_lock:
+        if _digits_users == 0:
+            _digits_saved = sys.get_int_max_str_digits()
+        _digits_users += 1
+        if _digits_saved and sys.get_int_max_str_digits() < digits:
+            sys.set_int_max_str_digits(digits)
+    try:
+        yield
+    finally:
+        with _digits_lock:
+            _digits_users -= 1
+            if _digits_users == 0:
+                sys.set_int_max_str_digits(_digits_saved)
+
+
+def int_text(value):
+    '''str() of a result, raising the digit limit only for the rare ones past it.'''
+    try:
+        return str(value)
+    except ValueError:
+        with raised_digit_limit():
+            return str(value)
+
+
+# PARSING
+def parse_natural(value, max_digits=MAX_DIGITS):
+    '''Natural number from a query string or JSON value, None if invalid or too long.
+    Strings are length-checked before int() ever sees them.'''
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if len(text) - (text[:1] in '+-') > max_digits:
+            return None
+        try:
+            if len(text) > (sys.get_int_max_str_digits() or len(text)):
+                with raised_digit_limit(max_digits + 1):
+                    value = int(text)
+            else:
+                value = int(text)
+        except ValueError:
+            return None
+    max_bits = MAX_BITS if max_digits == MAX_DIGITS else int(max_digits * log2(10)) + 1
+    if not isinstance(value, int) or value < 0 or value.bit_length() > max_bits:
+        return None
+    return value
+
+
+# ARITHMETIC
+def lcm(a, b):
+    '''Divide before multiplying so no intermediate is larger than the result.'''
+    if a == 0 or b == 0:
+        return 0
+    return a // gcd(a, b) * b
+
+
+def lcm_many(values):
+    '''lcm of all values by a pairwise reduction tree: operands at each level stay
+    about the same size, which big-int gcd/multiply handle much better than a long fold.'''
+    values = list(values)
+    while len(values) > 1:
+        values = [lcm(values[i], values[i + 1]) if i + 1 < len(values) else values[i]
+                  for i in range(0, len(values), 2)]
+    return values[0]
+
+
+def lcm_text(values):
+    return int_text(lcm_many(values))
+
+
+# GUARDED EXECUTION
+def is_heavy(values):
+    return sum(v.bit_length() for v in values) > HEAVY_BITS
+
+
+def compute_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+    return _pool
+
+
+def guarded_lcm(values, timeout=TIMEOUT):
+    '''lcm of values as text. Heavy inputs are computed in the process pool, off the
+    request thread; raises concurrent.futures.TimeoutError past timeout.'''
+    if not is_heavy(values):
+        return lcm_text(values)
+    return compute_pool().submit(lcm_text, values).result(timeout=timeout)
+
+
+async def guarded_lcm_async(values, timeout=TIMEOUT):
+    '''Same as guarded_lcm without blocking the event loop; raises asyncio.TimeoutError.'''
+    if not is_heavy(values):
+        return lcm_text(values)
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(compute_pool(), lcm_text, values), timeout)
+
+
+def parse_operands(xs, ys, zs=()):
+    '''Operands of one query from its x, y and z values, or None when the query is NaN:
+    not exactly one x and one y, more than MAX_OPERANDS operands, any invalid value, or all zeros.
+    Extra operands come from z only.'''
+    if len(xs) != 1 or len(ys) != 1 or 2 + len(zs) > MAX_OPERANDS:
+        return None
+    values = [parse_natural(v) for v in [*xs, *ys, *zs]]
+    if any(v is None for v in values) or not any(values):
+        return None
+    return values
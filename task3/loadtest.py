@@ -0,0 +1,212 @@
+import sys
+import time
+import json
+import socket
+import random
+import asyncio
+import argparse
+import threading
+import subprocess
+import http.client
+import numpy as np
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+ROUTE = '/hire_manishrai_gmail_com'
+
+
+def random_pairs(n, seed=0):
+    '''Mostly int64-sized pairs, some big ones and a few invalid entries.'''
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.9:
+            pairs.append([rng.randint(1, 10 ** 6), rng.randint(1, 10 ** 6)])
+        elif r < 0.98:
+            pairs.append([rng.randint(1, 10 ** 30), rng.randint(1, 10 ** 30)])
+        else:
+            pairs.append(['abc', -rng.randint(1, 100)])
+    return pairs
+
+
+def request(base, method, path, body=None, headers=None):
+    url = urlsplit(base)
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=60)
+    try:
+        conn.request(method, url.path.rstrip('/') + path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        return resp.status, resp.read().decode()
+    finally:
+        conn.close()
+
+
+def run_single(base, pairs, concurrency):
+    def one(pair):
+        status, text = request(base, 'GET', f'{ROUTE}?x={pair[0]}&y={pair[1]}')
+        return text
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, pairs))
+
+
+def run_batch(base, pairs, batch_size, concurrency):
+    def one(chunk):
+        body = '\n'.join(f'{x},{y}' for x, y in chunk)
+        status, text = request(base, 'POST', f'{ROUTE}/batch', body, {'Content-Type': 'application/x-ndjson'})
+        return text.split('\n')[:-1]
+
+    chunks = [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [r for results in pool.map(one, chunks) for r in results]
+
+
+def start_local_server():
+    '''The Flask app on a background thread, on a free port.'''
+    import logging
+    from werkzeug.serving import make_server
+    from app import app
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f'http://127.0.0.1:{server.server_port}'
+
+
+def start_asgi_server(workers):
+    '''serve.py (uvicorn workers) in a child process; stopped when the load test is done.'''
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    proc = subprocess.Popen([sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port),
+                             '--workers', str(workers), '--log-level', 'warning'])
+    base = f'http://127.0.0.1:{port}'
+    for _ in range(100):
+        try:
+            request(base, 'GET', '/stats')
+            return base, proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError('serve.py did not start')
+
+
+# QUERY RULES: x and y exactly once, further operands only as repeated z
+QUERY_CASES = [
+    ('x=4&y=6', '12'),
+    ('x=4&y=6&z=10&z=15', '60'),
+    ('x=4&x=5&y=6', 'NaN'),     # a repeated x or y is neither ignored nor an extra operand
+    ('x=4&y=6&y=7', 'NaN'),
+    ('y=6&z=4', 'NaN'),
+    ('x=4', 'NaN'),
+    ('x=0&y=0', 'NaN'),
+    ('x=0&y=5', '0'),
+]
+
+
+def check_queries(base):
+    for query, expected in QUERY_CASES:
+        status, text = request(base, 'GET', f'{ROUTE}?{query}')
+        assert text == expected, f'?{query}: expected {expected}, got {text}'
+
+
+# FIXED-RATE LATENCY
+def repeated_queries(n, distinct, seed=0):
+    '''Zipf-distributed picks from `distinct` pairs, half of them sent as (y, x).'''
+    rng = np.random.default_rng(seed)
+    pool = random_pairs(distinct, seed)
+    picks = np.minimum(rng.zipf(1.2, n), distinct) - 1
+    swap = rng.random(n) < 0.5
+    return [pool[i][::-1] if s else pool[i] for i, s in zip(picks, swap)]
+
+
+async def fixed_rate(base, rps, duration, queries):
+    '''Open loop: request i is due at i / rps, and its latency counts from that moment.'''
+    import aiohttp
+    loop = asyncio.get_running_loop()
+    url = base.rstrip('/') + ROUTE
+    n = int(rps * duration)
+
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as session:
+        start = loop.time()
+
+        async def one(i):
+            due = start + i / rps
+            await asyncio.sleep(max(0.0, due - loop.time()))
+            x, y = queries[i % len(queries)]
+            async with session.get(url, params={'x': str(x), 'y': str(y)}) as resp:
+                await resp.text()
+            return loop.time() - due
+
+        latencies = await asyncio.gather(*(one(i) for i in range(n)))
+        elapsed = loop.time() - start
+    return np.array(latencies) * 1000, n / elapsed
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description='Pairs/sec of the single-pair route vs the batch route, '
+                                             'or p50/p99 latency at a fixed request rate (--rps)')
+    ap.add_argument('--url', help='running service base URL (default: start the Flask app locally)')
+    ap.add_argument('--pairs', type=int, default=2000, help='pairs sent one per request')
+    ap.add_argument('--batch-pairs', type=int, default=200_000, help='pairs sent through the batch route')
+    ap.add_argument('--batch-size', type=int, default=10_000)
+    ap.add_argument('--concurrency', type=int, default=8)
+    ap.add_argument('--rps', type=float, help='instead: single-pair requests at this fixed rate, report p50/p99')
+    ap.add_argument('--duration', type=float, default=10, help='seconds of fixed-rate load')
+    ap.add_argument('--distinct', type=int, default=1000, help='distinct pairs in the fixed-rate traffic')
+    ap.add_argument('--server', choices=['flask', 'asgi'], default='flask', help='local server to start without --url')
+    ap.add_argument('--workers', type=int, default=2, help='uvicorn workers for --server asgi')
+    args = ap.parse_args()
+
+    proc = None
+    if args.url:
+        base = args.url
+    elif args.server == 'asgi':
+        base, proc = start_asgi_server(args.workers)
+    else:
+        base = start_local_server()
+
+    try:
+        check_queries(base)
+    except AssertionError:
+        if proc:
+            proc.terminate()
+        raise
+
+    if args.rps:
+        try:
+            lat, achieved = asyncio.run(fixed_rate(base, args.rps, args.duration,
+                                                   repeated_queries(int(args.rps * args.duration), args.distinct)))
+            status, stats = request(base, 'GET', '/stats')
+        finally:
+            if proc:
+                proc.terminate()
+        print(json.dumps({
+            'target_rps': args.rps,
+            'achieved_rps': round(achieved, 1),
+            'requests': len(lat),
+            'latency_ms': {'p50': round(float(np.percentile(lat, 50)), 2),
+                           'p99': round(float(np.percentile(lat, 99)), 2),
+                           'max': round(float(lat.max()), 2)},
+            'server_stats': json.loads(stats) if status == 200 else None,
+        }, indent=2))
+        sys.exit(0)
+
+    pairs = random_pairs(max(args.pairs, args.batch_pairs))
+
+    start = time.perf_counter()
+    single = run_single(base, pairs[:args.pairs], args.concurrency)
+    t_single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = run_batch(base, pairs[:args.batch_pairs], args.batch_size, args.concurrency)
+    t_batch = time.perf_counter() - start
+
+    if proc:
+        proc.terminate()
+    assert batch[:args.pairs] == single, 'batch results differ from the single-pair route'
+    rate_single, rate_batch = args.pairs / t_single, args.batch_pairs / t_batch
+    print(json.dumps({
+        'single_pairs_per_s': round(rate_single),
+        'batch_pairs_per_s': round(rate_batch),
+        'speedup': round(rate_batch / rate_single, 1),
+    }, indent=2))
@@ -1,31 +1,82 @@
 import os
 import re
-import sys
+import json
+import time
+import argparse
+from glob import glob
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import yaml
-import matplotlib.pyplot as plt
+import pyarrow.parquet as pq
 from dateutil import parser
-from collections import defaultdict
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Sequence, Tuple
 from tabulate import tabulate
 from textwrap import fill
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+from snapshot import load_snapshot
+from render import save_revenue_plot
+from reconcile import reconcile_users, block_histogram
 
 EUR_TO_USD = 1.2
 
+# libyaml parser when PyYAML was built with it, same safe semantics
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 # LOAD BOOKS.YAML
-def load_books(path: str) -> pd.DataFrame:
+def parse_books(path: str) -> pd.DataFrame:
     with open(path, "r", encoding="utf-8") as f:
-        books = yaml.safe_load(f)
+        books = yaml.load(f, Loader=YamlLoader)
 
     df = pd.DataFrame(books)
     df.columns = [c.replace(":", "") for c in df.columns]
 
-    df["author_list"] = df["author"].apply(
-        lambda x: tuple(sorted([a.strip() for a in str(x).split(",")])))
+    # One tuple per distinct author string, not per book
+    codes, uniques = pd.factorize(df["author"].astype(str))
+    sets = pd.Series([tuple(sorted(a.strip() for a in u.split(","))) for u in uniques], dtype=object)
+    set_codes, _ = pd.factorize(sets)
+    df["author_list"] = sets.to_numpy()[codes]
+    df["author_set_id"] = set_codes.astype(np.int32)[codes]
+    return df
+
+# Snapshot keeps author sets dictionary-encoded as "a, b, c" keys and
+# mixed-type columns (e.g. year: ints, "-", None) as JSON values
+AUTHOR_SEP = ", "
+JSON_SUFFIX = "__json"
+
+def encode_books(df: pd.DataFrame) -> pd.DataFrame:
+    out = df.drop(columns=["author_list", "author_set_id"])
+    for col in out.columns[out.dtypes == object]:
+        loc = out.columns.get_loc(col)
+        # encode before factorizing: factorize folds None into NaN
+        codes, uniques = pd.factorize(out.pop(col).map(json.dumps))
+        out.insert(loc, col + JSON_SUFFIX, pd.Categorical.from_codes(codes, uniques))
+    # categories in first-seen order, so their codes are parse_books' author_set_id
+    codes, uniques = pd.factorize(df["author_list"].map(AUTHOR_SEP.join))
+    out["author_set"] = pd.Categorical.from_codes(codes, uniques)
+    return out
+
+def decode_books(df: pd.DataFrame) -> pd.DataFrame:
+    for col in [c for c in df.columns if c.endswith(JSON_SUFFIX)]:
+        loc = df.columns.get_loc(col)
+        values = df.pop(col)
+        uniques = pd.Series([json.loads(v) for v in values.cat.categories], dtype=object)
+        df.insert(loc, col[:-len(JSON_SUFFIX)], uniques.to_numpy()[values.cat.codes.to_numpy()])
+    author_set = df.pop("author_set")
+    sets = pd.Series([tuple(k.split(AUTHOR_SEP)) for k in author_set.cat.categories], dtype=object)
+    df["author_list"] = sets.to_numpy()[author_set.cat.codes.to_numpy()]
+    df["author_set_id"] = author_set.cat.codes.to_numpy().astype(np.int32)
     return df
 
+def load_books(path: str, use_snapshot: bool = True) -> pd.DataFrame:
+    if not use_snapshot:
+        return parse_books(path)
+    return load_snapshot(path, parse_books, encode_books, decode_books)
+
 # CLEAN PRICE
 def parse_price(x: Any) -> float:
     if pd.isna(x):
@@ -52,84 +103,279 @@ def parse_timestamp(x: Any) -> pd.Timestamp:
     except:
         return pd.NaT
 
+# VECTORIZED PRICE CLEANING
+def clean_prices(values: pd.Series) -> pd.Series:
+    """Column-wise parse_price: works on the distinct price strings only,
+    rows the string ops cannot resolve fall back to parse_price."""
+    codes, uniques = pd.factorize(values)
+    raw = pd.Series(uniques, dtype=object).astype(str)
+
+    s = raw.str.strip()
+    for token, repl in (("USD", ""), ("usd", ""), ("¢", "."), ("$", ""), ("€", ""), (" ", "")):
+        s = s.str.replace(token, repl, regex=False)
+
+    val = pd.to_numeric(s, errors="coerce")
+    missing = val.isna()
+    val[missing] = pd.to_numeric(s[missing].str.extract(r"([0-9\.]+)", expand=False), errors="coerce")
+    val = val.where(~raw.str.contains("€", regex=False), val * EUR_TO_USD)
+
+    leftover = val.isna()
+    val[leftover] = raw[leftover].map(parse_price)
+
+    out = np.full(len(values), np.nan)
+    out[codes >= 0] = val.to_numpy(dtype=float)[codes[codes >= 0]]
+    return pd.Series(out, index=values.index)
+
+# VECTORIZED TIMESTAMP CLEANING
+MONTHS = ["january", "february", "march", "april", "may", "june", "july",
+          "august", "september", "october", "november", "december"]
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+LAYOUT_PATTERNS = [
+    (r"\b(?:" + "|".join(WEEKDAYS) + r")\b", "A"),
+    (r"\b(?:" + "|".join(d[:3] for d in WEEKDAYS) + r")\b", "a"),
+    (r"\b(?:" + "|".join(MONTHS) + r")\b", "B"),
+    (r"\b(?:" + "|".join(m[:3] for m in MONTHS) + r")\b", "b"),
+    (r"\d{1,2}:\d{1,2}:\d{1,2}", "H:M:S"),
+    (r"\d{1,2}:\d{1,2}", "H:M"),
+    (r"\d{4}", "Y"),
+    (r"\d{3}", "f"),
+    (r"\b(?:3[2-9]|[4-9]\d)\b", "X"),
+    (r"\b(?:1[3-9]|2\d|3[01])\b", "D"),
+    (r"\b\d{1,2}\b", "m"),
+]
+TS_SAMPLES = 3
+
+
+def infer_timestamp_format(text: str, parsed: pd.Timestamp) -> Optional[str]:
+    """Build a strptime format for `text` from its dateutil parse, or None if ambiguous."""
+    tokens = re.findall(r"\d+|[A-Za-z]+|[^\dA-Za-z]+", text)
+    has_ampm = any(t.lower() in ("am", "pm") for t in tokens)
+    time_fields = iter(["%I" if has_ampm else "%H", "%M", "%S"])
+    date_fields = {"%d": parsed.day, "%m": parsed.month, "%y": parsed.year % 100}
+    fmt = []
+
+    for i, tok in enumerate(tokens):
+        prev = tokens[i - 1] if i > 0 else ""
+        nxt = tokens[i + 1] if i + 1 < len(tokens) else ""
+        if tok.isdigit():
+            if prev == "." and fmt[-2:-1] == ["%S"]:
+                fmt.append("%f")
+            elif prev == ":" or nxt == ":":
+                field = next(time_fields, None)
+                if field is None:
+                    return None
+                fmt.append(field)
+            elif len(tok) == 4:
+                fmt.append("%Y")
+            else:
+                hits = [f for f, v in date_fields.items() if v == int(tok)]
+                if len(hits) != 1:
+                    return None
+                fmt.append(hits[0])
+                del date_fields[hits[0]]
+        elif tok.isalpha():
+            low = tok.lower()
+            if low in ("am", "pm"):
+                fmt.append("%p")
+            elif low == MONTHS[parsed.month - 1]:
+                fmt.append("%B")
+            elif low == MONTHS[parsed.month - 1][:3]:
+                fmt.append("%b")
+            elif low == WEEKDAYS[parsed.weekday()]:
+                fmt.append("%A")
+            elif low == WEEKDAYS[parsed.weekday()][:3]:
+                fmt.append("%a")
+            elif low == "t":
+                fmt.append(tok)
+            else:
+                return None
+        else:
+            fmt.append(tok.replace("%", "%%"))
+    return "".join(fmt)
+
+
+def clean_timestamps(values: pd.Series) -> pd.Series:
+    """Column-wise parse_timestamp: rows are grouped by layout and every
+    layout is parsed in one batch with an inferred format. Layouts that
+    cannot be inferred, and rows the format rejects, go through parse_timestamp."""
+    norm = (values.astype(object).astype(str).astype("string[pyarrow]")
+            .str.replace("A.M.", "AM", regex=False)
+            .str.replace("P.M.", "PM", regex=False)
+            .str.replace(r"[;,\s]+", " ", regex=True)
+            .str.strip())
+
+    layout = norm.str.lower()
+    for pattern, repl in LAYOUT_PATTERNS:
+        layout = layout.str.replace(pattern, repl, regex=True)
+    layout[values.isna()] = None
+
+    out = pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    leftover = [np.flatnonzero(values.isna().to_numpy())]
+    codes, _ = pd.factorize(layout)
+
+    for code, pos in pd.Series(np.arange(len(codes))).groupby(codes).indices.items():
+        if code < 0:
+            continue
+        fmt = None
+        for p in pos[:TS_SAMPLES]:
+            ref = parse_timestamp(values.iat[p])
+            if not pd.isna(ref) and ref.tzinfo is None:
+                fmt = infer_timestamp_format(norm.iat[p], ref)
+                if fmt:
+                    break
+        if fmt is None:
+            leftover.append(pos)
+            continue
+
+        parsed = pd.to_datetime(norm.iloc[pos], format=fmt, errors="coerce")
+        step = max(1, len(pos) // TS_SAMPLES)
+        if any(parse_timestamp(values.iat[pos[j]]) != parsed.iat[j]
+               for j in range(0, len(pos), step) if not pd.isna(parsed.iat[j])):
+            leftover.append(pos)
+            continue
+
+        out.iloc[pos] = parsed.to_numpy(dtype="datetime64[ns]")
+        leftover.append(pos[parsed.isna().to_numpy()])
+
+    rest = np.concatenate(leftover)
+    if len(rest):
+        out.iloc[rest] = pd.to_datetime(values.iloc[rest].map(parse_timestamp), errors="coerce")
+    return out
+
 # LOAD ORDERS
-def load_orders(path: str) -> pd.DataFrame:
-    df = pd.read_parquet(path)
-    df["unit_price_clean"] = df["unit_price"].apply(parse_price)
+def clean_orders(df: pd.DataFrame) -> pd.DataFrame:
+    df["unit_price_clean"] = clean_prices(df["unit_price"])
     df["quantity"] = pd.to_numeric(df["quantity"], errors="coerce")
-    df["timestamp_clean"] = df["timestamp"].apply(parse_timestamp)
+    df["timestamp_clean"] = clean_timestamps(df["timestamp"])
     df["date"] = df["timestamp_clean"].dt.date
     df["paid_price"] = df["quantity"] * df["unit_price_clean"]
     return df
 
-# 5. LOAD USERS
-def load_users(path: str) -> pd.DataFrame:
-    return pd.read_csv(path)
-
-# 6. USER RECONCILIATION
-def reconcile_users(users: pd.DataFrame) -> List[List[int]]:
-    fields = ["name", "address", "phone", "email"]
-    groups_dict = defaultdict(list)
+def load_orders(path: str) -> pd.DataFrame:
+    return clean_orders(pd.read_parquet(path))
 
-    for _, row in users.iterrows():
-        for i in range(len(fields)):
-            key = tuple(row[fields[j]] if j != i else None for j in range(len(fields)))
-            groups_dict[key].append(row["id"])
+# STREAM ORDERS (one parquet batch at a time)
+def iter_orders(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield clean_orders(batch.to_pandas())
 
-    return list(groups_dict.values())
+# 5. LOAD USERS
+def load_users(path: str, use_snapshot: bool = True) -> pd.DataFrame:
+    if not use_snapshot:
+        return pd.read_csv(path)
+    return load_snapshot(path, pd.read_csv)
+
+# AUTHOR-SET DIMENSION
+def author_set_table(books: pd.DataFrame) -> pd.Series:
+    """author_set_id -> author tuple, one row per interned set."""
+    first = books.drop_duplicates("author_set_id")
+    return pd.Series(first["author_list"].to_numpy(), index=first["author_set_id"].to_numpy(),
+                     name="author_list").sort_index()
+
+def author_bridge(sets: Sequence[tuple]) -> Tuple[pd.DataFrame, pd.Index]:
+    """(author_set_id, author_id) pairs for sets given by position, plus the author names."""
+    lengths = np.fromiter(map(len, sets), dtype=np.int64, count=len(sets))
+    author_id, authors = pd.factorize(pd.Series([a for s in sets for a in s], dtype=object))
+    bridge = pd.DataFrame({
+        "author_set_id": np.repeat(np.arange(len(sets), dtype=np.int32), lengths),
+        "author_id": author_id.astype(np.int32),
+    })
+    return bridge, pd.Index(authors, name="author")
 
 # MERGE BOOKS & ORDERS
 def compute_author_sets(books: pd.DataFrame, orders: pd.DataFrame) -> pd.DataFrame:
     merged = orders.merge(
-        books[["id", "author_list"]],
+        books[["id", "author_set_id"]],
         left_on="book_id",
         right_on="id",
         how="left",
         suffixes=("", "_book")
     )
+    merged["author_set_id"] = merged["author_set_id"].fillna(-1).astype(np.int32)
     return merged
 
-# FULL ANALYSIS PIPELINE
-def analyze_folder(folder_path: str) -> Dict[str, Any]:
-    books = load_books(os.path.join(folder_path, "books.yaml"))
-    users = load_users(os.path.join(folder_path, "users.csv"))
-    orders = load_orders(os.path.join(folder_path, "orders.parquet"))
-    orders2 = compute_author_sets(books, orders)
-    daily_rev = orders2.groupby("date")["paid_price"].sum().sort_values(ascending=False)
+# DATA FILES (base file plus appended deltas, e.g. orders_2025-07-01.parquet)
+def data_files(folder_path: str) -> Dict[str, Any]:
+    return {
+        "books": os.path.join(folder_path, "books.yaml"),
+        "users": sorted(glob(os.path.join(folder_path, "users*.csv"))),
+        "orders": sorted(glob(os.path.join(folder_path, "orders*.parquet"))),
+    }
+
+def folder_signature(folder_path: str) -> Tuple:
+    """(path, size, mtime_ns) of every input file; changes whenever a source does."""
+    files = data_files(folder_path)
+    signature = []
+    for path in [files["books"], *files["users"], *files["orders"]]:
+        st = os.stat(path)
+        signature.append((os.path.basename(path), st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+# PARTIAL AGGREGATES
+def aggregate_orders(orders2: pd.DataFrame, sets: pd.Series) -> Dict[str, pd.Series]:
+    # Author-set totals on int32 ids, named only for the sets that were ordered
+    ids = orders2["author_set_id"].to_numpy()
+    known = ids >= 0
+    ordered = np.bincount(ids[known], minlength=len(sets))
+    quantity = np.bincount(ids[known], weights=orders2["quantity"].fillna(0).to_numpy()[known],
+                           minlength=len(sets))
+    present = np.flatnonzero(ordered)
+    author_quantity = pd.Series(quantity[present], name="quantity",
+                                index=pd.Index(sets.to_numpy()[present], name="author_list", tupleize_cols=False))
+
+    return {
+        "daily_revenue": orders2.groupby("date")["paid_price"].sum(),
+        "author_quantity": author_quantity.sort_index(),
+        "user_spending": orders2.groupby("user_id")["paid_price"].sum(),
+    }
+
+def merge_aggregates(parts: List[Dict[str, pd.Series]]) -> Dict[str, pd.Series]:
+    return {key: pd.concat([p[key] for p in parts]).groupby(level=0).sum() for key in parts[0]}
+
+def aggregate_order_files(paths: List[str], books: pd.DataFrame,
+                          chunk_size: Optional[int] = None) -> Optional[Dict[str, pd.Series]]:
+    """Aggregates over all order files; with chunk_size only one batch is in memory at a time."""
+    sets = author_set_table(books)
+    total = None
+    for path in paths:
+        chunks = iter_orders(path, chunk_size) if chunk_size else [load_orders(path)]
+        for orders in chunks:
+            part = aggregate_orders(compute_author_sets(books, orders), sets)
+            total = part if total is None else merge_aggregates([total, part])
+    return total
+
+# RESULTS FROM AGGREGATES
+def build_results(aggregates: Dict[str, pd.Series], canonical: pd.Series) -> Dict[str, Any]:
+    daily_rev = aggregates["daily_revenue"].sort_values(ascending=False)
+    author_quantity = aggregates["author_quantity"]
+    spending = aggregates["user_spending"]
 
     # Alias groups
-    user_groups = reconcile_users(users)
-    unique_users_count = len(user_groups)
-    unique_author_sets = orders2["author_list"].nunique()
-
-    # Most popular author set
-    if not orders2.empty:
-        pop_author_set = (
-            orders2.groupby("author_list")["quantity"]
-            .sum()
-            .sort_values(ascending=False)
-            .index[0]
-        )
+    unique_users_count = int(canonical.nunique())
+    unique_author_sets = len(author_quantity)
+
+    # Most popular author set, and single author through the set bridge
+    if not author_quantity.empty:
+        pop_author_set = author_quantity.sort_values(ascending=False).index[0]
+        bridge, authors = author_bridge(author_quantity.index)
+        per_author = np.bincount(bridge["author_id"],
+                                 weights=author_quantity.to_numpy()[bridge["author_set_id"]],
+                                 minlength=len(authors))
+        pop_author = authors[int(np.argmax(per_author))] if len(authors) else None
     else:
         pop_author_set = ()
+        pop_author = None
 
     # Top Customer Group (PAYING)
-    if not orders2.empty:
-        # Compute spending per user_id
-        spending = orders2.groupby("user_id")["paid_price"].sum()
-
-        # Map user_id → alias group
-        groups = reconcile_users(users)
-
-        # Compute group spending
-        group_spending = {}
-        for members in groups:
-            total = sum(spending.get(uid, 0) for uid in members)
-            group_spending[tuple(members)] = total
-
-        # Find highest spending group
-        top_group = max(group_spending, key=group_spending.get)
-        top_customer = sorted(list(top_group))
+    if not spending.empty and not canonical.empty:
+        # Spending per real person in one pass
+        labels = canonical.reindex(spending.index).to_numpy()
+        known = ~np.isnan(labels)
+        group_spending = np.bincount(labels[known].astype(np.int64),
+                                     weights=spending.to_numpy()[known],
+                                     minlength=unique_users_count)
+        top_group = int(np.argmax(group_spending))
+        top_customer = sorted(canonical.index[canonical.to_numpy() == top_group].tolist())
     else:
         top_customer = []
 
@@ -138,48 +384,29 @@ def analyze_folder(folder_path: str) -> Dict[str, Any]:
         "unique_users": unique_users_count,
         "unique_author_sets": unique_author_sets,
         "most_popular_author_set": pop_author_set,
+        "most_popular_author": pop_author,
         "top_customer": top_customer,
         "daily_revenue": daily_rev
     }
 
+# FULL ANALYSIS PIPELINE
+def analyze_folder(folder_path: str, match: str = "exact", chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    files = data_files(folder_path)
+    books = load_books(files["books"])
+    users = pd.concat([load_users(p) for p in files["users"]], ignore_index=True)
+    aggregates = aggregate_order_files(files["orders"], books, chunk_size)
+
+    canonical, index = reconcile_users(users, mode=match, return_index=True)
+    results = build_results(aggregates, canonical)
+    if index is not None:
+        results["block_sizes"] = block_histogram(index)
+    return results
+
 # PLOT DAILY REVENUE
 def plot_revenue(daily_rev: pd.Series, folder_path: str, save_dir: str = "plots") -> None:
-    plt.figure(figsize=(12, 6))
-
-    # Sort by date
-    daily_rev_sorted = daily_rev.sort_index()
-
-    # Create blue bars
-    bars = plt.bar(daily_rev_sorted.index, daily_rev_sorted.values, color='steelblue', edgecolor='black')
-
-    # Light background and grid
-    plt.gca().set_facecolor('#f9f9f9')  # Light gray background
-    plt.grid(axis='y', linestyle='--', alpha=0.5)
-
-    # Labels and title
     folder_name = os.path.basename(os.path.normpath(folder_path))
-    plt.xlabel("Date", fontsize=12)
-    plt.ylabel("Revenue (USD)", fontsize=12)
-    plt.title(f"Daily Revenue (USD) - {folder_name}", fontsize=14)
-
-    # Rotate x-axis labels
-    plt.xticks(rotation=45, ha='right')
-
-    # Annotate top 5 revenue days
-    top5 = daily_rev_sorted.sort_values(ascending=False).head(5)
-    for bar, date in zip(bars, daily_rev_sorted.index):
-        if date in top5.index:
-            plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
-                     f"{bar.get_height():.2f}", ha='center', va='bottom',
-                     fontsize=9, fontweight='bold', color='darkred')
-
-    plt.tight_layout()
-
-    # Save plot
-    os.makedirs(save_dir, exist_ok=True)
     save_path = os.path.join(save_dir, f"{folder_name}_daily_revenue.png")
-    plt.savefig(save_path, dpi=300)
-    plt.close()
+    save_revenue_plot(daily_rev, f"Daily Revenue (USD) - {folder_name}", save_path, dpi=300)
 
 
 def wrap_text_list(items, width=80, indent="    "):
@@ -189,44 +416,98 @@ def wrap_text_list(items, width=80, indent="    "):
     return fill(text, width=width, subsequent_indent=indent)
 
 
+def print_results(folder_name: str, results: Dict[str, Any]) -> None:
+    file_name = os.path.basename(os.path.normpath(folder_name))
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python Data_processing.py <data_folder1> [<data_folder2> ...]")
-        sys.exit(1)
+    print(f"\n=== RESULTS FOR {file_name} ===\n")
+
+    # Table: Top 5 Revenue Days
+    top5_df = results["top5_days"].reset_index()
+    top5_df.columns = ["Date", "Revenue (USD)"]
+    print(tabulate(top5_df, headers="keys", tablefmt="fancy_grid", showindex=False))
+
+    # Summary table
+    wrapped_aliases = wrap_text_list(results["top_customer"], width=100)
+    wrapped_authors = ", ".join(results["most_popular_author_set"]) if results["most_popular_author_set"] else "None"
 
-    folders = sys.argv[1:]
+    summary = [
+        ["Unique users", results["unique_users"]],
+        ["Unique author sets", results["unique_author_sets"]],
+        ["Most popular author set", wrapped_authors],
+        ["Most popular author", results["most_popular_author"] or "None"],
+        ["Top Customer aliases", wrapped_aliases]
+    ]
 
-    for folder_name in folders:
-        results = analyze_folder(folder_name)
+    print("\n" + tabulate(summary, headers=["Metric", "Value"], tablefmt="fancy_grid"))
 
-        file_name = os.path.basename(os.path.normpath(folder_name))
+    if "block_sizes" in results:
+        print("\nAlias blocking index (blocks per size)")
+        print(tabulate(results["block_sizes"].T, headers="keys", tablefmt="fancy_grid"))
 
-        print(f"\n=== RESULTS FOR {file_name} ===\n")
+    if not results["daily_revenue"].empty:
+        print(f"\nSaved plot to plots/{file_name}_daily_revenue.png\n")
 
-        # Table: Top 5 Revenue Days
-        top5_df = results["top5_days"].reset_index()
-        top5_df.columns = ["Date", "Revenue (USD)"]
-        print(tabulate(top5_df, headers="keys", tablefmt="fancy_grid", showindex=False))
 
-        # Summary table
-        pop_authors = ", ".join(results["most_popular_author_set"]) if results["most_popular_author_set"] else "None"
-        best_aliases = ", ".join(map(str, results["top_customer"])) if results["top_customer"] else "None"
+# WORKER MEMORY CAP (address space, Linux/macOS only)
+def limit_worker_memory(max_mb: Optional[int]) -> None:
+    if max_mb and resource is not None:
+        limit = max_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
 
 
-        wrapped_aliases = wrap_text_list(results["top_customer"], width=100)
-        wrapped_authors = ", ".join(results["most_popular_author_set"]) if results["most_popular_author_set"] else "None"
+# ONE FOLDER: ANALYSIS + PLOT (runs inside a pool worker with --workers)
+def run_folder(folder_name: str, options: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    start = time.perf_counter()
+    if options["incremental"]:
+        from incremental import analyze_incremental
+        results = analyze_incremental(folder_name, chunk_size=options["chunk_size"])
+    else:
+        results = analyze_folder(folder_name, match=options["match"], chunk_size=options["chunk_size"])
+    analyzed = time.perf_counter()
+
+    if not results["daily_revenue"].empty:
+        plot_revenue(results["daily_revenue"], folder_name)
+    done = time.perf_counter()
 
-        summary = [
-            ["Unique users", results["unique_users"]],
-            ["Unique author sets", results["unique_author_sets"]],
-            ["Most popular author set", wrapped_authors],
-            ["Top Customer aliases", wrapped_aliases]
-        ]
+    return results, {"analysis": analyzed - start, "plot": done - analyzed, "total": done - start}
 
-        print("\n" + tabulate(summary, headers=["Metric", "Value"], tablefmt="fancy_grid"))
 
-        # Plot
-        if not results["daily_revenue"].empty:
-            plot_revenue(results["daily_revenue"], folder_name)
-            print(f"\nSaved plot to plots/{file_name}_daily_revenue.png\n")
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Analyze book sales data folders")
+    ap.add_argument("folders", nargs="+", metavar="data_folder")
+    ap.add_argument("--match", choices=["exact", "fuzzy"], default="exact",
+                    help="alias matching: exact field equality or normalized keys with a blocking index")
+    ap.add_argument("--incremental", action="store_true",
+                    help="fold only new order/user files into the state saved in <data_folder>/.analysis_state")
+    ap.add_argument("--chunk-size", type=int, default=None, metavar="ROWS",
+                    help="stream orders.parquet in batches of ROWS instead of loading it whole")
+    ap.add_argument("--workers", type=int, default=1, metavar="N",
+                    help="analyze and plot folders in N worker processes")
+    ap.add_argument("--max-worker-mem", type=int, default=None, metavar="MB",
+                    help="address-space cap per worker process (this process with --workers 1)")
+    args = ap.parse_args()
+    if args.incremental and args.match != "exact":
+        ap.error("--incremental supports exact alias matching only")
+    if args.max_worker_mem and resource is None:
+        ap.error("--max-worker-mem needs the resource module (Linux/macOS)")
+
+    options = {"match": args.match, "incremental": args.incremental, "chunk_size": args.chunk_size}
+    wall_start = time.perf_counter()
+
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=limit_worker_memory,
+                                 initargs=(args.max_worker_mem,)) as pool:
+            outputs = list(pool.map(run_folder, args.folders, [options] * len(args.folders)))
+    else:
+        limit_worker_memory(args.max_worker_mem)   # the folders run right here
+        outputs = [run_folder(folder_name, options) for folder_name in args.folders]
+
+    timing_rows = []
+    for folder_name, (results, timings) in zip(args.folders, outputs):
+        print_results(folder_name, results)
+        timing_rows.append([os.path.basename(os.path.normpath(folder_name)),
+                            f"{timings['analysis']:.2f}", f"{timings['plot']:.2f}", f"{timings['total']:.2f}"])
+
+    print(f"\n=== TIMINGS ({args.workers} worker{'s' if args.workers > 1 else ''}, "
+          f"wall {time.perf_counter() - wall_start:.2f}s) ===\n")
+    print(tabulate(timing_rows, headers=["Folder", "Analysis (s)", "Plot (s)", "Total (s)"], tablefmt="fancy_grid"))
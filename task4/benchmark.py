@@ -0,0 +1,197 @@
+import os
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing as mp
+from queue import Empty
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from Data_processing import (parse_price, parse_timestamp, clean_prices, clean_timestamps, analyze_folder,
+                             parse_books, load_books)
+from snapshot import snapshot_path
+from reconcile import FIELDS, MATCH_KEYS, reconcile_users
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FOLDERS = [os.path.join(BASE_DIR, "data", d) for d in ("DATA1", "DATA2", "DATA3")]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+# PRICE & TIMESTAMP CLEANING
+def bench_cleaning(folders, repeat=1):
+    rows = []
+    for folder in folders:
+        orders = pd.read_parquet(os.path.join(folder, "orders.parquet"))
+        orders = pd.concat([orders] * repeat, ignore_index=True)
+
+        def legacy(df):
+            return df["unit_price"].apply(parse_price), df["timestamp"].apply(parse_timestamp)
+
+        def vectorized(df):
+            return clean_prices(df["unit_price"]), clean_timestamps(df["timestamp"])
+
+        (old_price, old_ts), t_old = timed(legacy, orders)
+        (new_price, new_ts), t_new = timed(vectorized, orders)
+
+        assert np.array_equal(old_price.to_numpy(dtype=float), new_price.to_numpy(dtype=float), equal_nan=True), \
+            f"price mismatch in {folder}"
+        assert pd.to_datetime(old_ts).astype("datetime64[ns]").equals(new_ts), f"timestamp mismatch in {folder}"
+
+        n = len(orders)
+        rows.append([os.path.basename(folder), n, f"{n / t_old:,.0f}", f"{n / t_new:,.0f}", f"{t_old / t_new:.1f}x"])
+
+    print("\n=== load_orders cleaning (parity OK) ===")
+    print(tabulate(rows, headers=["Dataset", "Rows", "Before (rows/s)", "After (rows/s)", "Speedup"],
+                   tablefmt="fancy_grid"))
+
+
+# BOOKS SNAPSHOT
+def bench_snapshot(folders):
+    """load_books through the snapshot against parse_books, on each books.yaml and one with a date column."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = []
+        for folder in folders:
+            path = os.path.join(tmp, os.path.basename(folder) + ".yaml")
+            shutil.copy(os.path.join(folder, "books.yaml"), path)
+            cases.append(path)
+        # YAML dates cannot be encoded: no snapshot is written, the parsed frame is returned
+        with open(os.path.join(folders[0], "books.yaml"), encoding="utf-8") as f:
+            dated = f.read().replace("\n  :year:", "\n  :added: 2020-01-05\n  :year:")
+        cases.append(os.path.join(tmp, "dated.yaml"))
+        with open(cases[-1], "w", encoding="utf-8") as f:
+            f.write(dated)
+
+        for path in cases:
+            parsed, t_parse = timed(parse_books, path)
+            built = load_books(path)
+            loaded, t_load = timed(load_books, path)
+            pd.testing.assert_frame_equal(built, parsed)
+            pd.testing.assert_frame_equal(loaded, parsed)
+            stored = os.path.exists(snapshot_path(path))
+            rows.append([os.path.basename(path), len(parsed), "yes" if stored else "no",
+                         f"{t_parse:.3f}", f"{t_load:.3f}", f"{t_parse / t_load:.1f}x"])
+
+    print("\n=== load_books snapshot (parity OK) ===")
+    print(tabulate(rows, headers=["Books", "Rows", "Snapshot", "Parse (s)", "Load (s)", "Speedup"],
+                   tablefmt="fancy_grid"))
+
+
+# USER RECONCILIATION
+SYNTHETIC_FORMATS = {"name": "Person {}", "address": "{} Main St, Springfield", "phone": "{:010d}", "email": "user{}@mail.test"}
+
+
+def synthetic_users(n, alias_rate=0.3, seed=0):
+    """n user rows drawn from ~0.8n people; aliases differ from their person in one field."""
+    rng = np.random.default_rng(seed)
+    person = rng.integers(0, int(n * 0.8), n)
+    changed = np.where(rng.random(n) < alias_rate, rng.integers(0, len(FIELDS), n), -1)
+    users = pd.DataFrame({"id": np.arange(n)})
+    for j, field in enumerate(FIELDS):
+        values = person.copy()
+        values[changed == j] = n + rng.integers(0, 10 ** 9, (changed == j).sum())
+        users[field] = pd.Series(values).map(SYNTHETIC_FORMATS[field].format).astype("string[pyarrow]")
+    return users
+
+
+# Rows exact mode merges that the fuzzy keys or blocks miss: short phone, two-@ email,
+# a name that normalizes to nothing, and a block larger than MAX_BLOCK
+EDGE_USERS = pd.DataFrame(
+    [("Ann Lee", "1 Main St", "555", "ann@mail.test"), ("Ann Lee", "1 Main St", "555", "lee@mail.test"),
+     ("Bo Kim", "2 Oak Ave", "5550001111", "bo@@mail.test"), ("Bo Kim", "2 Oak Ave", "5550002222", "bo@@mail.test"),
+     ("!!!", "3 Elm St", "5551112222", "x@mail.test"), ("!!!", "9 Elm St", "5551112222", "x@mail.test")]
+    + [("Big Block", "4 Pine Rd", f"{i:010d}", "big@mail.test") for i in range(60)],
+    columns=FIELDS).astype("string[pyarrow]")
+EDGE_USERS.insert(0, "id", np.arange(len(EDGE_USERS)))
+
+
+def check_fuzzy_covers_exact(users, exact=None, fuzzy=None):
+    """Fuzzy mode merges whatever exact mode merges: every exact group is inside one fuzzy group."""
+    exact = reconcile_users(users, MATCH_KEYS, "exact") if exact is None else exact
+    fuzzy = reconcile_users(users, MATCH_KEYS, "fuzzy") if fuzzy is None else fuzzy
+    assert fuzzy.groupby(exact).nunique().max() == 1, "fuzzy mode splits users that exact mode merges"
+
+
+def bench_reconcile(n):
+    check_fuzzy_covers_exact(EDGE_USERS)
+    users = synthetic_users(n)
+    rows, ids = [], {}
+    for mode in ("exact", "fuzzy"):
+        ids[mode], elapsed = timed(reconcile_users, users, MATCH_KEYS, mode)
+        rows.append([mode, f"{n:,}", f"{ids[mode].nunique():,}", f"{elapsed:.2f}", f"{n / elapsed:,.0f}"])
+    check_fuzzy_covers_exact(users, ids["exact"], ids["fuzzy"])
+    print("\n=== reconcile_users (union-find, fuzzy covers exact) ===")
+    print(tabulate(rows, headers=["Mode", "Users", "Real users", "Seconds", "Users/s"], tablefmt="fancy_grid"))
+
+
+# STREAMING ORDERS
+def peak_rss_mb():
+    """Peak RSS of this process. VmHWM belongs to the address space, so unlike ru_maxrss
+    it does not carry over the parent's high-water mark into a spawned child."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def peak_rss_run(folder, chunk_size, queue):
+    start = time.perf_counter()
+    results = analyze_folder(folder, chunk_size=chunk_size)
+    elapsed = time.perf_counter() - start
+    queue.put((results["daily_revenue"].sum(), elapsed, peak_rss_mb()))
+
+
+def bench_streaming(folder, repeat, chunk_size):
+    """analyze_folder on a replicated orders.parquet, in-memory vs streamed, one fresh process each."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("books.yaml", "users.csv"):
+            shutil.copy(os.path.join(folder, name), tmp)
+        orders = pd.read_parquet(os.path.join(folder, "orders.parquet"))
+        pd.concat([orders] * repeat, ignore_index=True).to_parquet(
+            os.path.join(tmp, "orders.parquet"), row_group_size=chunk_size)
+
+        rows = []
+        ctx = mp.get_context("spawn")
+        for label, size in (("in-memory", None), ("streaming", chunk_size)):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=peak_rss_run, args=(tmp, size, queue))
+            proc.start()
+            while True:
+                try:
+                    revenue, elapsed, rss = queue.get(timeout=1)
+                    break
+                except Empty:
+                    if not proc.is_alive():
+                        raise RuntimeError(f"{label} run exited with code {proc.exitcode}")
+            proc.join()
+            rows.append([label, f"{len(orders) * repeat:,}", f"{revenue:,.2f}", f"{elapsed:.2f}", f"{rss:,.0f}"])
+
+    print("\n=== analyze_folder streaming ===")
+    print(tabulate(rows, headers=["Mode", "Orders", "Total revenue", "Seconds", "Peak RSS (MB)"],
+                   tablefmt="fancy_grid"))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Parity checks and throughput for the task4 pipeline")
+    ap.add_argument("folders", nargs="*", default=DEFAULT_FOLDERS)
+    ap.add_argument("--repeat", type=int, default=1, help="replicate each dataset N times")
+    ap.add_argument("--users", type=int, default=1_000_000, help="synthetic users for the reconciliation run")
+    ap.add_argument("--chunk-size", type=int, default=50_000, help="batch rows for the streaming run")
+    args = ap.parse_args()
+
+    bench_cleaning(args.folders, args.repeat)
+    bench_snapshot(args.folders)
+    bench_reconcile(args.users)
+    bench_streaming(args.folders[0], max(args.repeat, 20), args.chunk_size)
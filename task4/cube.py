@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import threading
+import pandas as pd
+import pyarrow as pa
+from typing import Any, Dict, Iterable, Optional
+
+from Data_processing import analyze_folder, folder_signature
+
+CUBE_FILE = ".results_cube.arrow"
+
+
+# WRITE CUBE
+def cube_path(folder_path: str) -> str:
+    return os.path.join(folder_path, CUBE_FILE)
+
+
+def build_cube(folder_path: str, results: Optional[Dict[str, Any]] = None) -> str:
+    """Materialize analyze_folder results as an Arrow IPC file: the daily
+    revenue series as columns, metrics and top-N tables in the schema metadata."""
+    signature = folder_signature(folder_path)
+    if results is None:
+        results = analyze_folder(folder_path)
+
+    daily = results["daily_revenue"].sort_index()
+    top5 = results["top5_days"]
+    meta = {
+        "signature": [list(s) for s in signature],
+        "top5_days": {"date": [str(d) for d in top5.index], "revenue": top5.tolist()},
+        "unique_users": results["unique_users"],
+        "unique_author_sets": int(results["unique_author_sets"]),
+        "most_popular_author_set": list(results["most_popular_author_set"]),
+        "most_popular_author": results["most_popular_author"],
+        "top_customer": [int(u) for u in results["top_customer"]],
+    }
+    table = pa.table({
+        "date": pa.array(pd.to_datetime(pd.Index(daily.index)).date, type=pa.date32()),
+        "revenue": pa.array(daily.to_numpy(dtype=float)),
+    }).replace_schema_metadata({"cube": json.dumps(meta)})
+
+    path = cube_path(folder_path)
+    tmp = path + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+    return path
+
+
+# READ CUBE
+def load_cube(folder_path: str) -> Optional[Dict[str, Any]]:
+    """Results dict from the memory-mapped cube, or None if it is missing or stale."""
+    path = cube_path(folder_path)
+    if not os.path.exists(path):
+        return None
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    meta = json.loads(table.schema.metadata[b"cube"])
+    if [tuple(s) for s in meta["signature"]] != list(folder_signature(folder_path)):
+        return None
+
+    daily = pd.Series(table.column("revenue").to_numpy(), name="paid_price",
+                      index=pd.Index(table.column("date").to_pylist(), name="date"))
+    top5 = pd.Series(meta["top5_days"]["revenue"], name="paid_price",
+                     index=pd.Index(pd.to_datetime(meta["top5_days"]["date"]).date, name="date"))
+    return {
+        "top5_days": top5,
+        "unique_users": meta["unique_users"],
+        "unique_author_sets": meta["unique_author_sets"],
+        "most_popular_author_set": tuple(meta["most_popular_author_set"]),
+        "most_popular_author": meta["most_popular_author"],
+        "top_customer": meta["top_customer"],
+        "daily_revenue": daily.sort_values(ascending=False),
+    }
+
+
+# IN-PROCESS STORE (dashboard)
+class CubeStore:
+    """Results per folder, loaded from the cube (built first if missing or
+    stale) and kept in memory until the folder's source files change."""
+
+    def __init__(self):
+        self._results = {}
+        self._locks = {}
+
+    def get(self, folder_path: str) -> Dict[str, Any]:
+        signature = folder_signature(folder_path)
+        with self._locks.setdefault(folder_path, threading.Lock()):
+            cached = self._results.get(folder_path)
+            if cached and cached[0] == signature:
+                return cached[1]
+            results = load_cube(folder_path)
+            if results is None:
+                build_cube(folder_path)
+                results = load_cube(folder_path)
+            self._results[folder_path] = (signature, results)
+            return results
+
+    def warm_up(self, folders: Iterable[str]) -> threading.Thread:
+        thread = threading.Thread(target=lambda: [self.get(f) for f in folders], daemon=True)
+        thread.start()
+        return thread
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python cube.py <data_folder1> [<data_folder2> ...]")
+        sys.exit(1)
+
+    for folder_name in sys.argv[1:]:
+        print(f"Saved results cube to {build_cube(folder_name)}")
@@ -0,0 +1,131 @@
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from Data_processing import (load_books, load_users, data_files, aggregate_order_files,
+                             merge_aggregates, build_results)
+from reconcile import extend_reconciliation, canonical_ids
+
+STATE_DIR = ".analysis_state"
+STATE_VERSION = 1
+
+
+# FILE SIGNATURES
+def file_signature(path: str) -> List[int]:
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+# LOAD / SAVE STATE
+def empty_state() -> Dict[str, Any]:
+    return {
+        "manifest": {"version": STATE_VERSION, "books": None, "users": {}, "orders": {}},
+        "aggregates": None,
+        "user_ids": np.zeros(0, dtype=np.int64),
+        "parent": np.zeros(0, dtype=np.int64),
+        "heads": pd.DataFrame({"key": pd.Series(dtype=np.int8), "hash": pd.Series(dtype=np.uint64),
+                               "row": pd.Series(dtype=np.int64)}),
+    }
+
+
+def load_state(folder_path: str) -> Optional[Dict[str, Any]]:
+    state_dir = os.path.join(folder_path, STATE_DIR)
+    manifest_path = os.path.join(state_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != STATE_VERSION:
+        return None
+
+    def table(name):
+        return pd.read_parquet(os.path.join(state_dir, f"{name}.parquet"))
+
+    daily = table("daily_revenue")
+    authors = table("author_quantity")
+    spending = table("user_spending")
+    users = table("users")
+    return {
+        "manifest": manifest,
+        "aggregates": {
+            "daily_revenue": daily.set_index("date")["paid_price"],
+            "author_quantity": pd.Series(authors["quantity"].to_numpy(),
+                                         index=pd.Index([tuple(a) for a in authors["author_list"]], name="author_list",
+                                                        tupleize_cols=False),
+                                         name="quantity"),
+            "user_spending": spending.set_index("user_id")["paid_price"],
+        },
+        "user_ids": users["id"].to_numpy(),
+        "parent": users["parent"].to_numpy(),
+        "heads": table("user_keys"),
+    }
+
+
+def save_state(folder_path: str, state: Dict[str, Any]) -> None:
+    state_dir = os.path.join(folder_path, STATE_DIR)
+    tmp_dir = state_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    agg = state["aggregates"]
+    agg["daily_revenue"].rename("paid_price").rename_axis("date").reset_index() \
+        .to_parquet(os.path.join(tmp_dir, "daily_revenue.parquet"), index=False)
+    pd.DataFrame({"author_list": [list(a) for a in agg["author_quantity"].index],
+                  "quantity": agg["author_quantity"].to_numpy()}) \
+        .to_parquet(os.path.join(tmp_dir, "author_quantity.parquet"), index=False)
+    agg["user_spending"].rename("paid_price").rename_axis("user_id").reset_index() \
+        .to_parquet(os.path.join(tmp_dir, "user_spending.parquet"), index=False)
+    pd.DataFrame({"id": state["user_ids"], "parent": state["parent"]}) \
+        .to_parquet(os.path.join(tmp_dir, "users.parquet"), index=False)
+    state["heads"].to_parquet(os.path.join(tmp_dir, "user_keys.parquet"), index=False)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(state["manifest"], f, indent=2)
+
+    # Swap in the new state only once it is complete
+    shutil.rmtree(state_dir, ignore_errors=True)
+    os.replace(tmp_dir, state_dir)
+
+
+# INCREMENTAL ANALYSIS
+def analyze_incremental(folder_path: str, chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """Same results as analyze_folder, folding in only order/user files not
+    seen by the persisted state. A changed books.yaml or a rewritten input
+    file invalidates the state and triggers a rebuild from scratch."""
+    files = data_files(folder_path)
+    state = load_state(folder_path)
+
+    def changed(kind):
+        for name, sig in state["manifest"][kind].items():
+            path = os.path.join(folder_path, name)
+            if not os.path.exists(path) or file_signature(path) != sig:
+                return True
+        return False
+
+    books_sig = file_signature(files["books"])
+    if state is None or state["manifest"]["books"] != books_sig or changed("users") or changed("orders"):
+        state = empty_state()
+        state["manifest"]["books"] = books_sig
+
+    manifest = state["manifest"]
+    new_users = [p for p in files["users"] if os.path.basename(p) not in manifest["users"]]
+    new_orders = [p for p in files["orders"] if os.path.basename(p) not in manifest["orders"]]
+
+    for path in new_users:
+        users = load_users(path)
+        state["parent"], state["heads"] = extend_reconciliation(state["parent"], state["heads"], users)
+        state["user_ids"] = np.concatenate([state["user_ids"], users["id"].to_numpy()])
+        manifest["users"][os.path.basename(path)] = file_signature(path)
+
+    if new_orders:
+        delta = aggregate_order_files(new_orders, load_books(files["books"]), chunk_size)
+        state["aggregates"] = merge_aggregates([state["aggregates"], delta]) if state["aggregates"] else delta
+        for path in new_orders:
+            manifest["orders"][os.path.basename(path)] = file_signature(path)
+
+    if new_users or new_orders:
+        save_state(folder_path, state)
+
+    return build_results(state["aggregates"], canonical_ids(state["parent"], state["user_ids"]))
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+from itertools import combinations
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+FIELDS = ["name", "address", "phone", "email"]
+
+# Two rows are the same person when they agree on all fields but one
+MATCH_KEYS = list(combinations(FIELDS, len(FIELDS) - 1))
+
+HASH_PRIME = np.uint64(0x9E3779B97F4A7C15)
+
+# Fuzzy mode: blocks larger than this are reported but not paired
+MAX_BLOCK = 50
+BLOCK_BINS = [1, 2, 3, 5, 9, 17, 33, 65, 129]
+
+# field -> (rows sorted by key, size of each block)
+BlockIndex = Dict[str, Tuple[np.ndarray, np.ndarray]]
+
+
+# NORMALIZE & ENCODE FIELDS
+def encode_fields(users: pd.DataFrame, fields: Sequence[str] = FIELDS) -> Dict[str, np.ndarray]:
+    """Dictionary-encode each stripped field to uint64 ids; blank or missing values get 0 and never match."""
+    encoded = {}
+    for field in fields:
+        col = users[field].astype("string[pyarrow]").str.strip()
+        codes, _ = pd.factorize(col.mask(col == ""))
+        encoded[field] = (codes + 1).astype(np.uint64)
+    return encoded
+
+
+def combine_codes(columns: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Hash a tuple of encoded columns into one key, plus a mask of rows with no missing part."""
+    valid = np.ones(len(columns[0]), dtype=bool)
+    key = np.zeros(len(columns[0]), dtype=np.uint64)
+    for col in columns:
+        valid &= col != 0
+        key = (key ^ col) * HASH_PRIME
+        key ^= key >> np.uint64(29)
+    return key, valid
+
+
+# DISJOINT SET
+def union_edges(parent: np.ndarray, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """Vectorized union-find over an edge batch: hook roots onto the smaller
+    root, then compress paths by pointer jumping until every node points at
+    its root. `parent` must already be fully compressed."""
+    while len(src):
+        ru, rv = parent[src], parent[dst]
+        live = ru != rv
+        src, dst, ru, rv = src[live], dst[live], ru[live], rv[live]
+        if not len(src):
+            break
+        np.minimum.at(parent, np.maximum(ru, rv), np.minimum(ru, rv))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+    return parent
+
+
+def link_edges(keys: np.ndarray, valid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Edges from every row to one representative row sharing its key."""
+    rows = np.flatnonzero(valid)
+    order = rows[np.argsort(keys[rows])]
+    sorted_keys = keys[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    head = np.maximum.accumulate(np.where(new_group, np.arange(len(order)), 0))
+    linked = ~new_group
+    return order[linked], order[head[linked]]
+
+
+# NORMALIZED MATCH KEYS
+def normalize_users(users: pd.DataFrame) -> pd.DataFrame:
+    """Canonical match keys: folded names, phone digits, lowercased email and
+    punctuation-free address tokens. Unusable values become <NA>."""
+    def text(field):
+        return users[field].astype("string[pyarrow]").str.lower()
+
+    def tokens(col):
+        return col.str.replace(r"[^\w\s]", " ", regex=True).str.replace(r"\s+", " ", regex=True).str.strip()
+
+    digits = text("phone").str.replace(r"\D", "", regex=True)
+    email = text("email").str.replace(r"\s+", "", regex=True)
+    keys = pd.DataFrame({
+        "name": tokens(text("name")),
+        "address": tokens(text("address")),
+        "phone": digits.str[-10:].where(digits.str.len() >= 7),
+        "email": email.where(email.str.count("@") == 1),
+    }, index=users.index)
+    return keys.mask(keys == "")
+
+
+# BLOCKING INDEX
+def build_block_index(keys: pd.DataFrame) -> BlockIndex:
+    """Inverted index per field: rows sorted by key, and the size of each block."""
+    index = {}
+    for field in keys.columns:
+        codes, _ = pd.factorize(keys[field])
+        rows = np.flatnonzero(codes >= 0)
+        rows = rows[np.argsort(codes[rows], kind="stable")]
+        sizes = np.bincount(codes[rows]) if len(rows) else np.zeros(0, dtype=np.int64)
+        index[field] = (rows, sizes)
+    return index
+
+
+def block_histogram(index: BlockIndex) -> pd.DataFrame:
+    """Number of blocks per size bucket and field; the last bucket holds the oversized ones."""
+    edges = BLOCK_BINS + [np.inf]
+    labels = [str(lo) if hi - lo == 1 else f"{lo}-{hi - 1}" for lo, hi in zip(BLOCK_BINS[:-1], BLOCK_BINS[1:])]
+    labels.append(f"{BLOCK_BINS[-1]}+")
+    hist = {field: np.histogram(sizes, bins=edges)[0] for field, (_, sizes) in index.items()}
+    out = pd.DataFrame(hist, index=pd.Index(labels, name="block size"))
+    out.loc["largest"] = [int(sizes.max()) if len(sizes) else 0 for _, sizes in index.values()]
+    return out
+
+
+def candidate_pairs(index: BlockIndex, max_block: int = MAX_BLOCK) -> Tuple[np.ndarray, np.ndarray]:
+    """All distinct row pairs that share at least one block of at most max_block rows."""
+    left, right = [], []
+    for rows, sizes in index.values():
+        starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+        block = np.repeat(sizes, sizes)
+        pos = np.arange(len(rows)) - starts
+        small = block <= max_block
+        for offset in range(1, int(block[small].max(initial=1))):
+            hit = np.flatnonzero(small & (pos + offset < block))
+            left.append(rows[hit])
+            right.append(rows[hit + offset])
+
+    if not left:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    a, b = np.concatenate(left), np.concatenate(right)
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    pair = np.unique(lo.astype(np.int64) << 32 | hi.astype(np.int64))
+    return pair >> 32, pair & 0xFFFFFFFF
+
+
+def match_pairs(keys: pd.DataFrame, a: np.ndarray, b: np.ndarray, min_agree: int = len(FIELDS) - 1) -> np.ndarray:
+    """Mask of candidate pairs whose normalized keys agree on at least min_agree fields."""
+    agree = np.zeros(len(a), dtype=np.int8)
+    for field in keys.columns:
+        codes, _ = pd.factorize(keys[field])
+        agree += (codes[a] == codes[b]) & (codes[a] >= 0)
+    return agree >= min_agree
+
+
+# USER RECONCILIATION
+def reconcile_users(users: pd.DataFrame, match_keys: Sequence[Sequence[str]] = MATCH_KEYS,
+                    mode: str = "exact", max_block: int = MAX_BLOCK,
+                    return_index: bool = False) -> Union[pd.Series, Tuple[pd.Series, Optional[BlockIndex]]]:
+    """Map every user id to a compact canonical id (0..k-1) of its real person.
+
+    mode="exact" links rows equal on a match key; mode="fuzzy" also compares
+    normalized keys of the candidate pairs produced by the blocking index, so it
+    merges at least what exact mode merges.
+    With return_index, returns (ids, blocking index), the index None in exact mode."""
+    if mode not in ("exact", "fuzzy"):
+        raise ValueError(f"Unknown reconciliation mode: {mode}")
+    parent = np.arange(len(users), dtype=np.int64)
+    index = None
+
+    # Repeated ids are the same user
+    parent = union_edges(parent, *link_edges(users["id"].to_numpy(), np.ones(len(users), dtype=bool)))
+
+    # Exact links in both modes: normalization drops short phones and odd emails,
+    # and blocking skips oversized blocks, which would lose some of them
+    encoded = encode_fields(users, sorted({f for key in match_keys for f in key}))
+    for key in match_keys:
+        parent = union_edges(parent, *link_edges(*combine_codes([encoded[f] for f in key])))
+
+    if mode == "fuzzy":
+        keys = normalize_users(users)
+        index = build_block_index(keys)
+        a, b = candidate_pairs(index, max_block)
+        same = match_pairs(keys, a, b, min_agree=min(len(k) for k in match_keys))
+        parent = union_edges(parent, a[same], b[same])
+
+    canonical = canonical_ids(parent, users["id"].to_numpy())
+    return (canonical, index) if return_index else canonical
+
+
+# INCREMENTAL RECONCILIATION
+def stable_key_hashes(users: pd.DataFrame, match_keys: Sequence[Sequence[str]] = MATCH_KEYS) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Run-independent (hash, valid) per key, the user id first and then each match key."""
+    hashes = [(pd.util.hash_array(users["id"].to_numpy()), np.ones(len(users), dtype=bool))]
+    for key in match_keys:
+        cols = pd.DataFrame({f: users[f].astype("string[pyarrow]").str.strip() for f in key})
+        valid = (cols.notna() & (cols != "")).all(axis=1).to_numpy()
+        hashes.append((pd.util.hash_pandas_object(cols.fillna(""), index=False).to_numpy(), valid))
+    return hashes
+
+
+def extend_reconciliation(parent: np.ndarray, heads: pd.DataFrame, users: pd.DataFrame,
+                          match_keys: Sequence[Sequence[str]] = MATCH_KEYS) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Fold appended user rows into a persisted union-find.
+
+    `heads` holds one (key, hash, row) entry per distinct key value seen so
+    far; new rows link to the stored head or to each other, then every key
+    value not seen before becomes a new head."""
+    offset = len(parent)
+    parent = np.concatenate([parent, np.arange(offset, offset + len(users), dtype=np.int64)])
+    src, dst, new_heads = [], [], [heads]
+
+    for k, (hashes, valid) in enumerate(stable_key_hashes(users, match_keys)):
+        known = heads[heads["key"] == k]
+        pos = pd.Index(known["hash"].to_numpy()).get_indexer(hashes)
+        seen = valid & (pos >= 0)
+        src.append(np.flatnonzero(seen) + offset)
+        dst.append(known["row"].to_numpy()[pos[seen]])
+
+        s, d = link_edges(hashes, valid)
+        src.append(s + offset)
+        dst.append(d + offset)
+
+        fresh = np.flatnonzero(valid & (pos < 0))
+        values, first = np.unique(hashes[fresh], return_index=True)
+        new_heads.append(pd.DataFrame({"key": np.int8(k), "hash": values, "row": fresh[first] + offset}))
+
+    parent = union_edges(parent, np.concatenate(src), np.concatenate(dst))
+    return parent, pd.concat(new_heads, ignore_index=True)
+
+
+def canonical_ids(parent: np.ndarray, user_ids: np.ndarray) -> pd.Series:
+    """Same mapping as reconcile_users, from a union-find parent array."""
+    canonical, _ = pd.factorize(parent)
+    mapping = pd.Series(canonical.astype(np.int32), index=pd.Index(user_ids, name="user_id"), name="canonical_id")
+    return mapping[~mapping.index.duplicated()]
@@ -0,0 +1,76 @@
+import os
+import hashlib
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Callable, Optional
+
+SNAPSHOT_SUFFIX = ".snapshot.parquet"
+HASH_BLOCK = 1 << 20
+
+
+# SNAPSHOT LOCATION & KEY
+def snapshot_path(source: str) -> str:
+    folder, name = os.path.split(source)
+    return os.path.join(folder, f".{name}{SNAPSHOT_SUFFIX}")
+
+
+def source_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_key(path: str) -> Optional[dict]:
+    try:
+        meta = pq.read_schema(path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return {k.decode(): v.decode() for k, v in meta.items() if k.startswith(b"source_")}
+
+
+def write_snapshot(table: pa.Table, path: str, key: dict) -> None:
+    meta = dict(table.schema.metadata or {})
+    meta.update({k.encode(): str(v).encode() for k, v in key.items()})
+    tmp = path + ".tmp"
+    pq.write_table(table.replace_schema_metadata(meta), tmp)
+    os.replace(tmp, path)
+
+
+# CACHED LOAD
+def load_snapshot(source: str, build: Callable[[str], pd.DataFrame],
+                  encode: Callable[[pd.DataFrame], pd.DataFrame] = lambda df: df,
+                  decode: Callable[[pd.DataFrame], pd.DataFrame] = lambda df: df) -> pd.DataFrame:
+    """Load `source` through a parquet snapshot stored next to it.
+
+    The snapshot is valid while the source size and mtime match; if only the
+    mtime moved, the content hash decides and the key is refreshed. Otherwise
+    `build` parses the source again and the snapshot is rewritten. `encode`
+    and `decode` convert between the in-memory and the stored table."""
+    st = os.stat(source)
+    path = snapshot_path(source)
+    key = read_key(path) if os.path.exists(path) else None
+
+    if key and key.get("source_size") == str(st.st_size):
+        if key.get("source_mtime_ns") == str(st.st_mtime_ns):
+            return decode(pd.read_parquet(path))
+        digest = source_digest(source)
+        if key.get("source_sha256") == digest:
+            table = pq.read_table(path)
+            try:
+                write_snapshot(table, path, {**key, "source_mtime_ns": st.st_mtime_ns})
+            except OSError:
+                pass
+            return decode(table.to_pandas())
+
+    key = {"source_size": st.st_size, "source_mtime_ns": st.st_mtime_ns, "source_sha256": source_digest(source)}
+    df = build(source)
+    try:
+        write_snapshot(pa.Table.from_pandas(encode(df), preserve_index=False), path, key)
+    except (OSError, pa.ArrowException):
+        pass  # read-only data folder: just skip caching
+    except (TypeError, ValueError):
+        pass  # values the encoding cannot store (e.g. YAML dates): no snapshot, same frame
+    return df
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
-from Data_processing import analyze_folder, plot_revenue
+from Data_processing import plot_revenue
+from cube import CubeStore
+from render import revenue_png
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -25,13 +26,16 @@ if not os.path.exists(folder_path):
     st.error(f"Folder not found: {folder_path}")
     st.stop()
 
-# Run analysis (cached)
-@st.cache_data
-def run_analysis(path):
-    return analyze_folder(path)
+# Results come from each folder's precomputed cube (python cube.py <folder>),
+# memory-mapped once per process; all datasets are warmed up in the background
+@st.cache_resource
+def cube_store():
+    store = CubeStore()
+    store.warm_up([p for p in folder_options.values() if os.path.exists(p)])
+    return store
 
-with st.spinner(f"Analyzing {selected_name}..."):
-    results = run_analysis(folder_path)
+with st.spinner(f"Loading {selected_name}..."):
+    results = cube_store().get(folder_path)
 
 # Display Top 5 Revenue Days & Key Metrics
 col1, col2 = st.columns(2)
@@ -58,6 +62,9 @@ with col2:
     author_str = ", ".join(author_tuple) if author_tuple else "N/A"
     st.success(author_str)
 
+    st.subheader("Most Popular Author")
+    st.success(results["most_popular_author"] or "N/A")
+
     st.subheader("Top Customer (All Aliases)")
     aliases = results["top_customer"]
     if aliases:
@@ -65,36 +72,9 @@ with col2:
     else:
         st.info("No buyer data")
 
-# Daily Revenue Bar Chart
+# Daily Revenue Bar Chart (shared renderer, cached by series content)
 st.subheader("Daily Revenue Over Time")
-daily_series = results["daily_revenue"].copy()
-daily_series.index = pd.to_datetime(daily_series.index)
-daily_series_sorted = daily_series.sort_index()
-
-fig, ax = plt.subplots(figsize=(12, 5))
-bars = ax.bar(daily_series_sorted.index, daily_series_sorted.values,
-              color='steelblue', edgecolor='black')
-
-# Light background
-ax.set_facecolor('#f9f9f9')
-ax.grid(axis='y', linestyle='--', alpha=0.3)
-
-# Labels and title
-ax.set_title(f"Daily Revenue - {selected_name}", fontsize=16, pad=20)
-ax.set_ylabel("Revenue (USD)", fontsize=12)
-ax.set_xlabel("Date", fontsize=12)
-plt.xticks(rotation=45)
-
-# Annotate top 5 revenue days
-top5_dates = daily_series_sorted.sort_values(ascending=False).head(5)
-for bar, date in zip(bars, daily_series_sorted.index):
-    if date in top5_dates.index:
-        plt.text(bar.get_x() + bar.get_width()/2, bar.get_height(),
-                 f"{bar.get_height():.2f}", ha='center', va='bottom',
-                 fontsize=9, fontweight='bold', color='darkred')
-
-plt.tight_layout()
-st.pyplot(fig)
+st.image(revenue_png(results["daily_revenue"], f"Daily Revenue - {selected_name}"), use_container_width=True)
 
 # Optional: Save plot button
 if st.button("Save Chart to plots/ folder"):
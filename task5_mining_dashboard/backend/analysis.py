@@ -1,71 +1,209 @@
 import numpy as np
 from scipy import stats
 from math import sqrt
+from functools import lru_cache
 from numpy.linalg import lstsq
 
+MA_SHIFT_MAX = 32   # windows up to this are summed by shifted adds (np.convolve's order), wider ones by cumsum
+GRUBBS_BLOCK = 256  # critical values computed per block of sample sizes
+GRUBBS_TOL = 1e-8   # relative margin under which a Grubbs round is recomputed directly
+
+def as_matrix(series):
+    """days x mines float matrix (a single series becomes one column). Column-major, so
+    per-column reductions add in the same order as on the 1-D series."""
+    arr = np.asarray(series, dtype=float)
+    if arr.ndim == 1:
+        arr = arr[:, None]
+    return np.asfortranarray(arr)
+
+def flagged(mask, **values):
+    """Columnar anomalies of every column: {"i": row indices, name: values[rows]} arrays."""
+    mask_t = mask.T
+    cols, rows = np.nonzero(mask_t)
+    picked = {name: v.T[mask_t] for name, v in values.items()}
+    bounds = np.searchsorted(cols, np.arange(mask.shape[1] + 1))
+    return [{"i": rows[a:b], **{name: p[a:b] for name, p in picked.items()}}
+            for a, b in zip(bounds[:-1], bounds[1:])]
+
+def records(columnar):
+    """Columnar anomalies of one series as the API's list of {"i": .., "v": .., ...} dicts."""
+    keys = list(columnar)
+    return [dict(zip(keys, row)) for row in zip(*(columnar[k].tolist() for k in keys))]
+
+def series_stats_matrix(m):
+    m = as_matrix(m)
+    mean = np.nanmean(m, axis=0)
+    std = np.nanstd(m, axis=0, ddof=1) if len(m) > 1 else np.zeros(m.shape[1])
+    median = np.nanmedian(m, axis=0)
+    q1, q3 = np.nanpercentile(m, [25, 75], axis=0)
+    return [{"mean": float(mean[j]), "std": float(std[j]), "median": float(median[j]),
+             "q1": float(q1[j]), "q3": float(q3[j]), "iqr": float(q3[j] - q1[j])}
+            for j in range(m.shape[1])]
+
 def series_stats(series):
-    arr = np.array(series, dtype=float)
-    return {
-        "mean": float(np.nanmean(arr)),
-        "std": float(np.nanstd(arr, ddof=1)) if arr.size>1 else 0.0,
-        "median": float(np.nanmedian(arr)),
-        "q1": float(np.nanpercentile(arr,25)),
-        "q3": float(np.nanpercentile(arr,75)),
-        "iqr": float(np.nanpercentile(arr,75) - np.nanpercentile(arr,25))
-    }
+    return series_stats_matrix(series)[0]
 
-def anomalies_iqr(series, k=1.5):
-    s = np.array(series, dtype=float)
-    q1, q3 = np.nanpercentile(s, [25,75])
+def anomalies_iqr_matrix(m, k=1.5):
+    m = as_matrix(m)
+    q1, q3 = np.nanpercentile(m, [25, 75], axis=0)
     iqr = q3 - q1
     lo, hi = q1 - k*iqr, q3 + k*iqr
-    return [{"i":int(i),"v":float(v)} for i,v in enumerate(s) if (v<lo or v>hi)]
+    return flagged((m < lo) | (m > hi), v=m)
+
+def anomalies_iqr(series, k=1.5):
+    return records(anomalies_iqr_matrix(series, k)[0])
+
+def anomalies_zscore_matrix(m, thresh=3.0):
+    m = as_matrix(m)
+    if len(m) <= 1:
+        return flagged(np.zeros(m.shape, dtype=bool), v=m, z=m)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (m - np.nanmean(m, axis=0)) / np.nanstd(m, axis=0, ddof=1)
+    return flagged(np.abs(z) > thresh, v=m, z=z)
 
 def anomalies_zscore(series, thresh=3.0):
-    s = np.array(series, dtype=float)
-    if len(s)<=1: return []
-    z = (s - np.nanmean(s))/np.nanstd(s, ddof=1)
-    return [{"i":int(i),"v":float(s[i]), "z":float(z[i])} for i in range(len(s)) if abs(z[i])>thresh]
+    return records(anomalies_zscore_matrix(series, thresh)[0])
+
+def window_sums(a, w):
+    """Sum of the last w rows (fewer at the start) for every row of a 2-D array."""
+    n = len(a)
+    if w > MA_SHIFT_MAX:
+        c = np.cumsum(a, axis=0)
+        c[w:] -= c[:n-w].copy()
+        return c
+    res = np.zeros(a.shape)
+    for k in reversed(range(min(w, n))):
+        res[k:] += a[:n-k]
+    return res
 
 def moving_average(arr, w):
-    a = np.array(arr, dtype=float)
-    res = np.convolve(np.nan_to_num(a), np.ones(w),'full')[:len(a)]
-    counts = np.convolve(~np.isnan(a), np.ones(w),'full')[:len(a)]
+    a = as_matrix(arr)
+    valid = ~np.isnan(a)
+    counts = np.cumsum(valid, axis=0)
+    counts[w:] -= counts[:len(a)-w].copy()
     with np.errstate(invalid='ignore'):
-        return res / counts
+        res = window_sums(np.where(valid, a, 0.0), w) / counts
+    return res if np.ndim(arr) > 1 else res[:, 0]
+
+def anomalies_ma_pct_matrix(m, window=7, pct=0.3):
+    m = as_matrix(m)
+    ma = moving_average(m, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dev = np.abs(m - ma) / np.abs(ma)
+    mask = ~np.isnan(ma) & (ma != 0) & (dev > pct)
+    return flagged(mask, v=m, ma=ma)
 
 def anomalies_ma_pct(series, window=7, pct=0.3):
-    s = np.array(series, dtype=float)
-    ma = moving_average(s, window)
-    res=[]
-    for i,v in enumerate(s):
-        if np.isnan(ma[i]) or ma[i]==0: continue
-        if abs(v - ma[i]) / abs(ma[i]) > pct:
-            res.append({"i":i,"v":float(v),"ma":float(ma[i])})
-    return res
+    return records(anomalies_ma_pct_matrix(series, window, pct)[0])
+
+@lru_cache(maxsize=256)
+def _grubbs_critical_block(top, alpha):
+    ns = np.maximum(np.arange(top, top - GRUBBS_BLOCK, -1), 3)
+    t = stats.t.ppf(1 - alpha/(2*ns), ns-2)
+    return ((ns-1)/np.sqrt(ns)) * np.sqrt(t*t / (ns-2 + t*t))
+
+def grubbs_critical(n, alpha):
+    """Two-sided Grubbs critical value for n values, computed a block of sizes at a time and cached."""
+    top = -(-n // GRUBBS_BLOCK) * GRUBBS_BLOCK
+    return float(_grubbs_critical_block(top, alpha)[top - n])
 
 def grubbs_test(series, alpha=0.05):
-    s = list(series)
-    n_total = len(s)
-    indices = list(range(n_total))
-    outliers=[]
-    while len(s) > 2:
-        arr = np.array(s, dtype=float)
-        mean = arr.mean()
-        sd = arr.std(ddof=1)
-        if sd == 0: break
-        deviations = np.abs(arr-mean)
-        max_idx = int(np.argmax(deviations))
-        G = deviations[max_idx] / sd
-        n = len(arr)
-        t = stats.t.ppf(1 - alpha/(2*n), n-2)
-        Gcrit = ((n-1)/sqrt(n)) * sqrt(t*t / (n-2 + t*t))
-        if G > Gcrit:
-            outliers.append({"i": indices[max_idx], "v": float(arr[max_idx]), "G": float(G)})
-            s.pop(max_idx)
-            indices.pop(max_idx)
-        else:
+    """Iterative Grubbs test: while the most extreme value has G > Gcrit, record and remove it.
+
+    The values are sorted once, so the most extreme one is at an end of the remaining range,
+    and mean/std come from running sums, so a removal is O(1). When two candidates or G and
+    Gcrit are too close to call on running sums, that round is computed directly (as the
+    original loop did), so the outliers found are exactly the same."""
+    x = np.array(series, dtype=float)
+    n = len(x)
+    if n <= 2 or not np.isfinite(x).all():
+        # a NaN/inf makes G NaN on the first round: nothing is ever removed
+        return []
+
+    order = np.argsort(x, kind="stable")            # by value, then original index
+    vals = x[order].tolist()
+    idx = order.tolist()
+    pos_of = np.empty(n, dtype=np.intp)
+    pos_of[order] = np.arange(n)
+    run_start = np.searchsorted(x[order], x[order], "left").tolist()
+    run_end = (np.searchsorted(x[order], x[order], "right") - 1).tolist()
+    head = list(range(n))                           # first live position of each run of equal values
+    alive = np.ones(n, dtype=bool)                  # by sorted position
+    lo, hi, size = 0, n - 1, n
+
+    def moments():
+        rest = x[order[alive]]
+        c = float(rest.mean())
+        y = rest - c
+        return c, float(y.sum()), float((y*y).sum())
+
+    def remove(p):
+        nonlocal lo, hi, size, s1, s2
+        alive[p] = False
+        size -= 1
+        y = vals[p] - c
+        s1 -= y
+        s2 -= y*y
+        while lo <= hi and not alive[lo]:
+            lo += 1
+        while hi >= lo and not alive[hi]:
+            hi -= 1
+
+    def first_alive(p):
+        r = run_start[p]
+        while not alive[head[r]]:
+            head[r] += 1
+        return head[r]
+
+    c, s1, s2 = moments()
+    m2_ref = s2 - s1*s1/size
+    outliers = []
+    while size > 2:
+        m2 = s2 - s1*s1/size
+        if m2 < m2_ref / 16:
+            # running sums lose precision as the spread shrinks: rebuild them around the current mean
+            c, s1, s2 = moments()
+            m2 = m2_ref = s2 - s1*s1/size
+        if vals[lo] == vals[hi]:
             break
+        gcrit = grubbs_critical(size, alpha)
+
+        mean = c + s1/size
+        sd = sqrt(m2 / (size-1)) if m2 > 0 else 0.0
+        dlo, dhi = mean - vals[lo], vals[hi] - mean
+        if dhi >= dlo:
+            d, p = dhi, first_alive(hi)
+            q = run_start[hi] - 1
+            while q >= lo and not alive[q]:
+                q -= 1
+            rival = max(dlo, vals[q] - mean if q >= lo else 0.0)
+        else:
+            d, p = dlo, lo
+            q = run_end[lo] + 1
+            while q <= hi and not alive[q]:
+                q += 1
+            rival = max(dhi, mean - vals[q] if q <= hi else 0.0)
+        margin = GRUBBS_TOL * max(d, abs(mean))
+
+        if sd > 0 and d - rival > 2*margin and abs(d/sd - gcrit) > GRUBBS_TOL*gcrit + margin/sd:
+            G = d / sd
+            if not G > gcrit:
+                break
+        else:
+            # too close to call: this round exactly as the direct computation
+            rest = np.sort(order[alive])
+            arr = x[rest]
+            sd = arr.std(ddof=1)
+            if sd == 0:
+                break
+            deviations = np.abs(arr - arr.mean())
+            k = int(np.argmax(deviations))
+            G = float(deviations[k] / sd)
+            if not G > gcrit:
+                break
+            p = int(pos_of[rest[k]])
+        outliers.append({"i": idx[p], "v": vals[p], "G": float(G)})
+        remove(p)
     return outliers
 
 
@@ -75,7 +213,36 @@ def poly_fit(xs, ys, degree=1):
     return coeffs.tolist()
 
 def poly_predict(coeffs, xs):
-    xs = np.array(xs)
-    deg = len(coeffs)-1
-    vals = sum(coeffs[i] * xs**i for i in range(deg+1))
+    """Horner evaluation of sum(coeffs[i] * x**i)."""
+    xs = np.asarray(xs, dtype=float)
+    vals = np.zeros(xs.shape)
+    for c in reversed(coeffs):
+        vals = vals * xs + c
     return vals.tolist()
+
+@lru_cache(maxsize=16)
+def vander_solver(n, degree):
+    """Least-squares solver for polynomial fits on x = 0..n-1, the grid every mine shares.
+    Works on t = x/(n-1), where the Vandermonde matrix is well conditioned (raw x reaches
+    3650**degree), and is factored once per (n, degree).
+    Returns (V, S, scale): V the Vandermonde matrix in t, S so that S @ y are the coefficients
+    in t, and scale turning those into coefficients in x."""
+    t = np.arange(n) / max(n-1, 1)
+    v = np.vander(t, N=degree+1, increasing=True)
+    if n > degree:
+        q, r = np.linalg.qr(v)
+        solver = np.linalg.solve(r, q.T)
+    else:
+        solver = np.linalg.pinv(v)
+    scale = float(max(n-1, 1)) ** -np.arange(degree+1)
+    for a in (v, solver, scale):
+        a.flags.writeable = False
+    return v, solver, scale
+
+def poly_trend_matrix(m, degree=1):
+    """Polynomial trend of every column of a days x mines matrix in one solve.
+    Returns (coeffs, values): (degree+1) x mines coefficients in powers of x = 0..days-1,
+    lowest first, and the days x mines fitted values."""
+    v, solver, scale = vander_solver(len(m), degree)
+    c = solver @ m
+    return c * scale[:, None], v @ c
@@ -0,0 +1,194 @@
+import sys
+import json
+import asyncio
+import numpy as np
+from functools import partial
+from collections import OrderedDict
+from analysis import (as_matrix, records, series_stats_matrix, anomalies_iqr_matrix, anomalies_zscore_matrix,
+                      anomalies_ma_pct_matrix, grubbs_test, poly_trend_matrix)
+
+DEFAULT_PARAMS = {"iqr_k": 1.5, "z_thresh": 3.0, "ma_window": 7, "ma_pct": 0.3, "grubbs_alpha": 0.05, "trend_degree": 1}
+INT_PARAMS = ("ma_window", "trend_degree")
+
+# the settings JSONResponse renders with, so cached fragments join into the same bytes
+encode = partial(json.dumps, ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+# every part of the analysis and the params it depends on: changing z_thresh only reruns "z"
+PARTS = {
+    "stats": (),
+    "iqr": ("iqr_k",),
+    "z": ("z_thresh",),
+    "ma_pct": ("ma_window", "ma_pct"),
+    "grubbs": ("grubbs_alpha",),
+    "trend": ("trend_degree",),
+}
+
+
+def normalize_params(params):
+    """Request params with defaults filled in and numbers coerced, so equal requests share cache keys."""
+    out = {}
+    for name, default in DEFAULT_PARAMS.items():
+        value = params.get(name, default)
+        out[name] = int(value) if name in INT_PARAMS else float(value)
+    return out
+
+
+def approx_size(obj):
+    """Approximate memory held by a cached value, in bytes."""
+    if isinstance(obj, np.ndarray):
+        # getsizeof includes the data of arrays that own it, not of views
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is not None else 0)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(approx_size(k) + approx_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(approx_size(v) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """Least recently used entries are evicted once the total size passes max_bytes.
+    Keys are tuples whose first item is the kind of entry; hits and misses are counted per kind."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.kinds = {}
+        self._data = OrderedDict()
+
+    def _count(self, key, outcome):
+        kind = self.kinds.setdefault(key[0], {"hits": 0, "misses": 0})
+        kind[outcome] += 1
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self._count(key, "misses")
+            return None
+        self._data.move_to_end(key)
+        self._count(key, "hits")
+        return entry[0]
+
+    def put(self, key, value, size=None):
+        size = approx_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        if key in self._data:
+            self.bytes -= self._data.pop(key)[1]
+        self._data[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, old_size) = self._data.popitem(last=False)
+            self.bytes -= old_size
+            self.evictions += 1
+
+    def metrics(self):
+        hits = sum(k["hits"] for k in self.kinds.values())
+        lookups = hits + sum(k["misses"] for k in self.kinds.values())
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+            "kinds": {name: {**k, "hit_rate": round(k["hits"] / (k["hits"] + k["misses"]), 4)}
+                      for name, k in self.kinds.items()},
+        }
+
+
+# COMPUTE
+def sheet_matrix(df):
+    """dates (JSON encoded), mine names and the days x (mines + total) matrix of a sheet."""
+    dates = df["Date"].dt.strftime("%Y-%m-%d").tolist()
+    names = [c for c in df.columns if c != "Date"]
+    m = as_matrix(df[names].astype(float))
+    total_series = np.nan_to_num(m).sum(axis=1)
+    return encode(dates), names, as_matrix(np.column_stack([m, total_series]))
+
+
+def compute_part(part, m, params):
+    """One part of the analysis for every column of m."""
+    if part == "stats":
+        return series_stats_matrix(m)
+    if part == "iqr":
+        return [records(c) for c in anomalies_iqr_matrix(m, k=params["iqr_k"])]
+    if part == "z":
+        return [records(c) for c in anomalies_zscore_matrix(m, thresh=params["z_thresh"])]
+    if part == "ma_pct":
+        return [records(c) for c in anomalies_ma_pct_matrix(m, window=params["ma_window"], pct=params["ma_pct"])]
+    if part == "grubbs":
+        return [grubbs_test(m[:, j], alpha=params["grubbs_alpha"]) for j in range(m.shape[1])]
+    if part == "trend":
+        coeffs, values = poly_trend_matrix(np.nan_to_num(m), degree=params["trend_degree"])
+        return list(zip(coeffs.T.tolist(), values.T.tolist()))
+    raise ValueError(f"unknown analysis part {part!r}")
+
+
+def part_fragments(part, m, params, result=None):
+    """The part's members of every column's JSON object, e.g. '"z":[{"i":3,...}]'.
+    Encoding is most of the cost of a response, so parts are cached encoded.
+    `result` is the part already computed for these columns, if it was."""
+    if result is None:
+        result = compute_part(part, m, params)
+    if part == "trend":
+        return ['"trend_coeffs":' + encode(c) + ',"trend_values":' + encode(v) for c, v in result]
+    return [f'"{part}":' + encode(r) for r in result]
+
+
+def parts_fragments(parts, m, params, computed=None):
+    """part_fragments of several parts over the same columns, one task of the compute pool."""
+    computed = computed or {}
+    return {part: part_fragments(part, m, params, computed.get(part)) for part in parts}
+
+
+def assemble(dates, names, fragments):
+    """The /api/analyze JSON body, byte for byte what JSONResponse renders for the same dict."""
+    columns = ["{" + ",".join(fragments[part][j] for part in PARTS) + "}" for j in range(len(names) + 1)]
+    mines = ",".join(encode(name) + ":" + column for name, column in zip(names, columns))
+    return ('{"dates":' + dates + ',"mines":{' + mines + '},"total":' + columns[-1] + "}").encode("utf-8")
+
+
+class AnalysisCache:
+    """Analysis results keyed by sheet content digest and params, at two levels:
+    - the JSON response for the full (digest, params)
+    - the encoded result of each part of the analysis for (digest, the params that part uses)"""
+
+    def __init__(self, max_bytes):
+        self.lru = LRUCache(max_bytes)
+
+    async def matrix(self, df, digest):
+        key = ("sheet", digest)
+        found = self.lru.get(key)
+        if found is None:
+            found = await asyncio.to_thread(sheet_matrix, df)
+            self.lru.put(key, found)
+        return found
+
+    def part_key(self, part, digest, params):
+        return (part, digest) + tuple(params[name] for name in PARTS[part])
+
+    async def response(self, df, digest, params, compute):
+        """JSON body of the analysis of df (whose CSV has the given digest) with normalized params.
+        Missing parts are computed by `await compute(parts, m, params)`, a dict of part fragments."""
+        key = ("response", digest) + tuple(params[name] for name in DEFAULT_PARAMS)
+        body = self.lru.get(key)
+        if body is not None:
+            return body
+
+        dates, names, m = await self.matrix(df, digest)
+        fragments, missing = {}, []
+        for part in PARTS:
+            found = self.lru.get(self.part_key(part, digest, params))
+            if found is None:
+                missing.append(part)
+            else:
+                fragments[part] = found
+        if missing:
+            computed = await compute(missing, m, params)
+            for part in missing:
+                fragments[part] = computed[part]
+                self.lru.put(self.part_key(part, digest, params), computed[part])
+
+        body = await asyncio.to_thread(assemble, dates, names, fragments)
+        self.lru.put(key, body, len(body))
+        return body
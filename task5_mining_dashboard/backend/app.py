@@ -1,12 +1,14 @@
 import os
-import io
+import asyncio
 import pandas as pd
 import numpy as np
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from aiohttp import ClientSession
 from dotenv import load_dotenv
-from analysis import series_stats, anomalies_iqr, anomalies_zscore, anomalies_ma_pct, grubbs_test, poly_fit, poly_predict
+from sheet_cache import SheetCache
+from analysis_cache import AnalysisCache, normalize_params
+from compute import ComputeExecutor
 from pathlib import Path
 from weasyprint import HTML, CSS
 from jinja2 import Template
@@ -15,8 +17,25 @@ load_dotenv()
 SHEET_CSV_URL = os.getenv("SHEET_CSV_URL")
 if not SHEET_CSV_URL:
     raise RuntimeError("SHEET_CSV_URL not set in env")
-
-app = FastAPI(title="Mining Dashboard API")
+SHEET_TTL = float(os.getenv("SHEET_TTL", 60))
+SHEET_STALE_WHILE_REVALIDATE = os.getenv("SHEET_STALE_WHILE_REVALIDATE", "0").lower() in ("1", "true", "yes")
+ANALYSIS_CACHE_MB = float(os.getenv("ANALYSIS_CACHE_MB", 256))
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", os.cpu_count() or 1))   # 0: compute on the event loop
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", 2))
+ANALYSIS_TIMEOUT = float(os.getenv("ANALYSIS_TIMEOUT", 60))
+
+sheet = SheetCache(SHEET_CSV_URL, ttl=SHEET_TTL, stale_while_revalidate=SHEET_STALE_WHILE_REVALIDATE)
+analysis_cache = AnalysisCache(int(ANALYSIS_CACHE_MB * 2**20))
+executor = ComputeExecutor(ANALYSIS_WORKERS, max_concurrent=ANALYSIS_CONCURRENCY, timeout=ANALYSIS_TIMEOUT)
+
+@asynccontextmanager
+async def lifespan(app):
+    executor.warm_up()
+    yield
+    await sheet.close()
+    executor.shutdown()
+
+app = FastAPI(title="Mining Dashboard API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,18 +46,8 @@ app.add_middleware(
 )
 
 async def fetch_sheet():
-    async with ClientSession() as sess:
-        async with sess.get(SHEET_CSV_URL) as r:
-            if r.status != 200:
-                raise HTTPException(status_code=500, detail="Failed to fetch sheet")
-            txt = await r.text()
-    df = pd.read_csv(io.StringIO(txt))
-    df.columns = df.columns.str.strip()
-    if "Date" not in df.columns:
-        raise HTTPException(status_code=500, detail="Date column missing in sheet")
-    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-    df = df.dropna(subset=["Date"]).reset_index(drop=True)
-    return df
+    # cached and shared between requests: read only
+    return await sheet.get()
 
 @app.get("/")
 def home():
@@ -54,50 +63,19 @@ async def get_data():
 
 @app.post("/api/analyze")
 async def analyze(payload: dict):
-    params = payload.get("params", {})
-    iqr_k = float(params.get("iqr_k", 1.5))
-    z_thresh = float(params.get("z_thresh", 3.0))
-    ma_window = int(params.get("ma_window", 7))
-    ma_pct = float(params.get("ma_pct", 0.3))
-    grubbs_alpha = float(params.get("grubbs_alpha", 0.05))
-    trend_degree = int(params.get("trend_degree", 1))
-
+    params = normalize_params(payload.get("params", {}))
     df = await fetch_sheet()
-    dates = df["Date"].dt.strftime("%Y-%m-%d").tolist()
-    mines = {}
-    total_series = np.zeros(len(df))
-
-    for c in df.columns:
-        if c == "Date":
-            continue
-        series = df[c].astype(float).tolist()
-        total_series += np.nan_to_num(np.array(series))
-        stats = series_stats(series)
-        mines[c] = {
-            "stats": stats,
-            "iqr": anomalies_iqr(series, k=iqr_k),
-            "z": anomalies_zscore(series, thresh=z_thresh),
-            "ma_pct": anomalies_ma_pct(series, window=ma_window, pct=ma_pct),
-            "grubbs": grubbs_test(series, alpha=grubbs_alpha),
-        }
-        xs = list(range(len(series)))
-        coeffs = poly_fit(xs, np.nan_to_num(series), degree=trend_degree)
-        mines[c]["trend_coeffs"] = coeffs
-        mines[c]["trend_values"] = poly_predict(coeffs, xs)
-
-    total_stats = series_stats(total_series)
-    total_obj = {
-        "stats": total_stats,
-        "iqr": anomalies_iqr(total_series, k=iqr_k),
-        "z": anomalies_zscore(total_series, thresh=z_thresh),
-        "ma_pct": anomalies_ma_pct(total_series, window=ma_window, pct=ma_pct),
-        "grubbs": grubbs_test(total_series, alpha=grubbs_alpha),
-        "trend_coeffs": poly_fit(list(range(len(total_series))), total_series, trend_degree),
-        "trend_values": poly_predict(poly_fit(list(range(len(total_series))), total_series, trend_degree),
-                                      list(range(len(total_series))))
-    }
-
-    return {"dates": dates, "mines": mines, "total": total_obj}
+    # identical sheet + params: the cached response; otherwise only the parts whose params changed rerun,
+    # in the compute pool
+    try:
+        body = await analysis_cache.response(df, sheet.digest, params, executor.fragments)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Analysis timed out")
+    return Response(content=body, media_type="application/json")
+
+@app.get("/api/metrics")
+def metrics():
+    return {"analysis_cache": analysis_cache.lru.metrics(), "compute": executor.stats, "sheet": sheet.stats}
 
 @app.post("/api/report")
 async def make_report(payload: dict):
@@ -0,0 +1,170 @@
+import time
+import argparse
+import numpy as np
+from math import sqrt
+from scipy import stats
+from analysis import (as_matrix, records, anomalies_iqr_matrix, anomalies_zscore_matrix,
+                      anomalies_ma_pct_matrix, grubbs_test, poly_trend_matrix, poly_predict)
+
+
+def make_matrix(days, mines, seed=0):
+    """days x mines daily output with spikes, drops and a few missing days."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(50, 500, mines)
+    m = (base * (1 + 0.1 * rng.standard_normal((days, mines)))).round(1)
+    spikes = rng.random((days, mines)) < 0.01
+    m[spikes] *= rng.choice([0.2, 3.0], spikes.sum())
+    m[rng.random((days, mines)) < 0.005] = np.nan
+    return as_matrix(m)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - start
+
+
+# DETECTORS: the original per-element loops, one series at a time
+def legacy_iqr(series, k=1.5):
+    s = np.array(series, dtype=float)
+    q1, q3 = np.nanpercentile(s, [25,75])
+    iqr = q3 - q1
+    lo, hi = q1 - k*iqr, q3 + k*iqr
+    return [{"i":int(i),"v":float(v)} for i,v in enumerate(s) if (v<lo or v>hi)]
+
+def legacy_zscore(series, thresh=3.0):
+    s = np.array(series, dtype=float)
+    if len(s)<=1: return []
+    z = (s - np.nanmean(s))/np.nanstd(s, ddof=1)
+    return [{"i":int(i),"v":float(s[i]), "z":float(z[i])} for i in range(len(s)) if abs(z[i])>thresh]
+
+def legacy_moving_average(arr, w):
+    a = np.array(arr, dtype=float)
+    res = np.convolve(np.nan_to_num(a), np.ones(w),'full')[:len(a)]
+    counts = np.convolve(~np.isnan(a), np.ones(w),'full')[:len(a)]
+    with np.errstate(invalid='ignore'):
+        return res / counts
+
+def legacy_ma_pct(series, window=7, pct=0.3):
+    s = np.array(series, dtype=float)
+    ma = legacy_moving_average(s, window)
+    res=[]
+    for i,v in enumerate(s):
+        if np.isnan(ma[i]) or ma[i]==0: continue
+        if abs(v - ma[i]) / abs(ma[i]) > pct:
+            res.append({"i":i,"v":float(v),"ma":float(ma[i])})
+    return res
+
+
+def legacy_grubbs(series, alpha=0.05):
+    s = list(series)
+    n_total = len(s)
+    indices = list(range(n_total))
+    outliers=[]
+    while len(s) > 2:
+        arr = np.array(s, dtype=float)
+        mean = arr.mean()
+        sd = arr.std(ddof=1)
+        if sd == 0: break
+        deviations = np.abs(arr-mean)
+        max_idx = int(np.argmax(deviations))
+        G = deviations[max_idx] / sd
+        n = len(arr)
+        t = stats.t.ppf(1 - alpha/(2*n), n-2)
+        Gcrit = ((n-1)/sqrt(n)) * sqrt(t*t / (n-2 + t*t))
+        if G > Gcrit:
+            outliers.append({"i": indices[max_idx], "v": float(arr[max_idx]), "G": float(G)})
+            s.pop(max_idx)
+            indices.pop(max_idx)
+        else:
+            break
+    return outliers
+
+
+def legacy_detectors(m, window):
+    out = []
+    for j in range(m.shape[1]):
+        series = m[:, j].tolist()
+        out.append((legacy_iqr(series), legacy_zscore(series), legacy_ma_pct(series, window=window)))
+    return out
+
+
+def matrix_detectors(m, window):
+    iqr, z, ma = anomalies_iqr_matrix(m), anomalies_zscore_matrix(m), anomalies_ma_pct_matrix(m, window=window)
+    return iqr, z, ma
+
+
+def bench_detectors(days, mines, window):
+    m = make_matrix(days, mines)
+    old, t_old = timed(legacy_detectors, m, window)
+    cols, t_new = timed(matrix_detectors, m, window)
+    new, t_records = timed(lambda: [tuple(records(c[j]) for c in cols) for j in range(mines)])
+    if window <= 7:
+        assert new == old, "matrix detectors differ from the per-series loops"
+    else:
+        # wide windows: moving averages agree to rounding, the flagged days are the same
+        assert [[[a["i"] for a in r] for r in col] for col in new] == \
+               [[[a["i"] for a in r] for r in col] for col in old], "flagged days differ"
+    print(f"detectors {days} days x {mines} mines, window {window} (parity OK): "
+          f"loops {t_old:.3f}s, matrix {t_new:.3f}s ({t_old / t_new:.0f}x), "
+          f"+ records {t_records:.3f}s ({t_old / (t_new + t_records):.1f}x end to end)")
+
+
+def contaminated_series(n, fraction, seed=0):
+    """Normal noise with `fraction` of the points replaced by outliers of widely varying size."""
+    rng = np.random.default_rng(seed)
+    s = rng.normal(100, 10, n)
+    bad = rng.random(n) < fraction
+    s[bad] = 100 + rng.choice([-1, 1], bad.sum()) * 10 ** rng.uniform(1.5, 4, bad.sum())
+    return s.round(2).tolist()
+
+
+def bench_grubbs(n, fraction):
+    series = contaminated_series(n, fraction)
+    old, t_old = timed(legacy_grubbs, series)
+    new, t_new = timed(grubbs_test, series)
+    assert [(o["i"], o["v"]) for o in new] == [(o["i"], o["v"]) for o in old], "Grubbs outliers differ"
+    print(f"grubbs n={n}, {fraction:.0%} contaminated, {len(old)} outliers (parity OK): "
+          f"loop {t_old:.3f}s, sorted {t_new:.3f}s ({t_old / t_new:.0f}x)")
+
+
+# TREND: the original per-mine vander + lstsq and power-sum evaluation
+def legacy_trend(m, degree):
+    out = []
+    for j in range(m.shape[1]):
+        xs = list(range(len(m)))
+        x = np.vander(xs, N=degree+1, increasing=True)
+        coeffs, *_ = np.linalg.lstsq(x, m[:, j], rcond=None)
+        xs = np.array(xs)
+        out.append(sum(coeffs[i] * xs**i for i in range(degree+1)))
+    return np.array(out).T
+
+
+def bench_trend(days, mines, degree):
+    m = np.nan_to_num(make_matrix(days, mines))
+    old, t_old = timed(legacy_trend, m, degree)
+    (coeffs, new), t_new = timed(poly_trend_matrix, m, degree)
+    horner = np.array([poly_predict(coeffs[:, j], range(days)) for j in range(3)]).T
+    assert np.allclose(horner, new[:, :3], rtol=1e-9), "coefficients do not reproduce the fitted values"
+    # raw-x fits lose precision fast with the degree: report the gap instead of asserting it
+    gap = np.abs(old - new).max() / np.abs(new).max()
+    print(f"trend {days} days x {mines} mines, degree {degree}: per-mine lstsq {t_old:.3f}s, "
+          f"one solve {t_new:.4f}s ({t_old / t_new:.0f}x), max relative gap {gap:.1e}")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Analysis speed on a synthetic days x mines sheet")
+    ap.add_argument("--days", type=int, default=3650)
+    ap.add_argument("--mines", type=int, default=300)
+    ap.add_argument("--window", type=int, nargs="+", default=[7, 60])
+    ap.add_argument("--grubbs-n", type=int, nargs="+", default=[3650, 20000])
+    ap.add_argument("--contamination", type=float, default=0.1)
+    ap.add_argument("--degree", type=int, nargs="+", default=[1, 3, 5])
+    args = ap.parse_args()
+
+    for w in args.window:
+        bench_detectors(args.days, args.mines, w)
+    for n in args.grubbs_n:
+        bench_grubbs(n, args.contamination)
+    for d in args.degree:
+        bench_trend(args.days, args.mines, d)
@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing as mp
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from analysis_cache import compute_part, parts_fragments
+
+MIN_CHUNK = 8   # columns per pool task at least
+
+
+def column_chunks(n, chunks):
+    """(start, stop) of `chunks` contiguous column ranges covering 0..n."""
+    bounds = np.linspace(0, n, chunks + 1).round().astype(int).tolist()
+    return [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def noop():
+    return None
+
+
+class ComputeExecutor:
+    """Runs the analysis off the event loop, in a process pool.
+
+    - parts are computed per chunk of columns (mines) in parallel, then merged in column order
+    - at most max_concurrent computations run at once, the rest wait for a slot
+    - a computation (waiting included) that exceeds timeout raises asyncio.TimeoutError;
+      its queued chunks are cancelled, chunks already running finish in their worker
+
+    workers=0 computes inline on the event loop, as before the pool existed."""
+
+    def __init__(self, workers, max_concurrent=2, timeout=60.0):
+        self.workers = workers
+        self.timeout = timeout
+        self.limit = asyncio.Semaphore(max_concurrent)
+        self.stats = {"running": 0, "waiting": 0, "completed": 0, "timeouts": 0, "tasks": 0}
+        self._pool = None
+
+    def pool(self):
+        if self._pool is None:
+            # spawn: the server process has threads (to_thread, the event loop) that fork would copy mid-state
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def warm_up(self):
+        """Start the worker processes now rather than on the first analysis."""
+        if self.workers:
+            for _ in range(self.workers):
+                self.pool().submit(noop)
+
+    async def fragments(self, parts, m, params):
+        """parts_fragments of m under the concurrency limit and the timeout."""
+        async def limited():
+            self.stats["waiting"] += 1
+            try:
+                await self.limit.acquire()
+            finally:
+                self.stats["waiting"] -= 1
+            self.stats["running"] += 1
+            try:
+                return await self._fragments(parts, m, params)
+            finally:
+                self.stats["running"] -= 1
+                self.limit.release()
+        try:
+            result = await asyncio.wait_for(limited(), self.timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise
+        self.stats["completed"] += 1
+        return result
+
+    async def _fragments(self, parts, m, params):
+        """parts_fragments of m, chunked by columns over the pool."""
+        if not self.workers:
+            return parts_fragments(parts, m, params)
+
+        loop = asyncio.get_running_loop()
+        computed = {}
+        if "trend" in parts:
+            # one solve over all columns (its rounding must not depend on the chunking), encoded per chunk
+            computed["trend"] = await asyncio.to_thread(compute_part, "trend", m, params)
+
+        chunks = column_chunks(m.shape[1], max(1, min(self.workers, m.shape[1] // MIN_CHUNK)))
+        self.stats["tasks"] += len(chunks)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(self.pool(), parts_fragments, parts, m[:, a:b], params,
+                                 {part: r[a:b] for part, r in computed.items()})
+            for a, b in chunks))
+        return {part: [f for r in results for f in r[part]] for part in parts}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,142 @@
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import numpy as np
+import aiohttp
+
+# Latency under mixed load: analyses keep the API busy while cheap requests probe the event loop.
+#   python loadtest.py --days 3650 --mines 300 --workers 2
+#   python loadtest.py --days 3650 --mines 300 --workers 0    (analysis on the event loop, the old way)
+# Starts sheet_stub.py and the API with uvicorn in child processes. The analysis cache is off
+# by default (--cache-mb 0) so every analyze request computes.
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(session, url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{proc.args} exited with {proc.returncode}")
+        try:
+            async with session.get(url) as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def start_servers(args):
+    stub_port, api_port = free_port(), free_port()
+    stub = subprocess.Popen([sys.executable, "sheet_stub.py", "--days", str(args.days), "--mines", str(args.mines),
+                             "--port", str(stub_port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    env = dict(os.environ,
+               SHEET_CSV_URL=f"http://127.0.0.1:{stub_port}/sheet.csv",
+               ANALYSIS_WORKERS=str(args.workers),
+               ANALYSIS_CONCURRENCY=str(args.max_concurrent),
+               ANALYSIS_TIMEOUT=str(args.timeout),
+               ANALYSIS_CACHE_MB=str(args.cache_mb))
+    api = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(api_port), "--log-level", "warning"],
+                           env=env)
+    return stub, api, f"http://127.0.0.1:{api_port}"
+
+
+def summary(latencies):
+    lat = np.array(latencies) * 1000
+    if not len(lat):
+        return {"requests": 0}
+    return {"requests": len(lat),
+            "p50_ms": round(float(np.percentile(lat, 50)), 1),
+            "p99_ms": round(float(np.percentile(lat, 99)), 1),
+            "max_ms": round(float(lat.max()), 1)}
+
+
+async def analyze_loop(session, base, stop, i, latencies, statuses):
+    """Back-to-back analyses; params vary so the response cache never answers."""
+    n = 0
+    while time.monotonic() < stop:
+        params = {"z_thresh": 2 + 0.01 * (i * 1000 + n), "grubbs_alpha": 0.05}
+        start = time.monotonic()
+        async with session.post(f"{base}/api/analyze", json={"params": params}) as resp:
+            await resp.read()
+            statuses[resp.status] = statuses.get(resp.status, 0) + 1
+        latencies.append(time.monotonic() - start)
+        n += 1
+
+
+async def probe(session, base, path, rps, stop, latencies):
+    """Open loop until `stop`: probe i is due at i / rps and its latency counts from that moment."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    n = int(rps * (stop - time.monotonic()))
+
+    async def one(due):
+        await asyncio.sleep(max(0.0, due - loop.time()))
+        async with session.get(base + path) as resp:
+            await resp.read()
+        latencies.append(loop.time() - due)
+
+    await asyncio.gather(*(one(start + i / rps) for i in range(n)))
+
+
+async def main(args):
+    stub, api, base = start_servers(args)
+    try:
+        async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0),
+                                         timeout=aiohttp.ClientTimeout(total=args.timeout + 30)) as session:
+            await wait_ready(session, base + "/", api)
+            # first fetch of the sheet, and worker start-up, outside the measurement
+            async with session.post(f"{base}/api/analyze", json={"params": {}}) as resp:
+                await resp.read()
+
+            idle = []
+            await probe(session, base, "/", args.probe_rps, time.monotonic() + 2, idle)
+
+            analyze_lat, probe_lat, statuses = [], [], {}
+            stop = time.monotonic() + args.duration
+            await asyncio.gather(
+                probe(session, base, "/", args.probe_rps, stop, probe_lat),
+                *(analyze_loop(session, base, stop, i, analyze_lat, statuses) for i in range(args.analyze_concurrency)))
+
+            async with session.get(base + "/api/metrics") as resp:
+                metrics = await resp.json()
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+    print(json.dumps({
+        "workers": args.workers,
+        "sheet": f"{args.days} days x {args.mines} mines",
+        "probe_idle": summary(idle),
+        "probe_under_load": summary(probe_lat),
+        "analyze": {**summary(analyze_lat), "per_s": round(len(analyze_lat) / args.duration, 2),
+                    "statuses": statuses},
+        "compute": metrics["compute"],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="GET / latency while /api/analyze requests run")
+    ap.add_argument("--days", type=int, default=3650)
+    ap.add_argument("--mines", type=int, default=300)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="ANALYSIS_WORKERS (0: inline)")
+    ap.add_argument("--max-concurrent", type=int, default=2, help="ANALYSIS_CONCURRENCY")
+    ap.add_argument("--timeout", type=float, default=60, help="ANALYSIS_TIMEOUT")
+    ap.add_argument("--cache-mb", type=float, default=0, help="ANALYSIS_CACHE_MB")
+    ap.add_argument("--analyze-concurrency", type=int, default=4, help="analyze requests kept in flight")
+    ap.add_argument("--probe-rps", type=float, default=50)
+    ap.add_argument("--duration", type=float, default=15)
+    asyncio.run(main(ap.parse_args()))
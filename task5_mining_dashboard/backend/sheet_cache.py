@@ -0,0 +1,110 @@
+import io
+import time
+import asyncio
+import hashlib
+import logging
+import pandas as pd
+from aiohttp import ClientSession, ClientTimeout
+from fastapi import HTTPException
+
+log = logging.getLogger(__name__)
+
+
+def parse_sheet(txt):
+    df = pd.read_csv(io.StringIO(txt))
+    df.columns = df.columns.str.strip()
+    if "Date" not in df.columns:
+        raise HTTPException(status_code=500, detail="Date column missing in sheet")
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    df = df.dropna(subset=["Date"]).reset_index(drop=True)
+    return df
+
+
+class SheetCache:
+    """Parsed sheet shared by all requests.
+
+    - one long-lived aiohttp session
+    - the DataFrame is reused for `ttl` seconds, then revalidated with
+      If-None-Match / If-Modified-Since (a 304 keeps the parsed frame)
+    - concurrent requests share a single in-flight fetch
+    - stale_while_revalidate: an expired frame is still served while the
+      refresh runs in the background
+
+    The returned DataFrame is shared, callers must not modify it in place.
+    """
+
+    def __init__(self, url, ttl=60.0, stale_while_revalidate=False, timeout=30.0):
+        self.url = url
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        self.timeout = timeout
+        self.df = None
+        self.digest = None          # sha256 of the CSV text, identifies the data version
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self.stats = {"hits": 0, "stale": 0, "fetches": 0, "not_modified": 0, "parsed": 0, "errors": 0}
+        self._session = None
+        self._inflight = None
+
+    async def get(self):
+        if self.df is not None and time.monotonic() - self.fetched_at < self.ttl:
+            self.stats["hits"] += 1
+            return self.df
+        if self.df is not None and self.stale_while_revalidate:
+            self.stats["stale"] += 1
+            self._start_refresh()
+            return self.df
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self):
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._refresh())
+            self._inflight.add_done_callback(self._refresh_done)
+        return self._inflight
+
+    def _refresh_done(self, task):
+        self._inflight = None
+        if not task.cancelled() and task.exception() is not None:
+            self.stats["errors"] += 1
+            log.warning("sheet refresh failed: %r", task.exception())
+
+    async def _refresh(self):
+        headers = {}
+        if self.df is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        self.stats["fetches"] += 1
+        async with self.session().get(self.url, headers=headers) as r:
+            if r.status == 304 and self.df is not None:
+                self.stats["not_modified"] += 1
+                self.fetched_at = time.monotonic()
+                return self.df
+            if r.status != 200:
+                raise HTTPException(status_code=500, detail="Failed to fetch sheet")
+            txt = await r.text()
+            etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+
+        # servers without validators still resend identical content: skip the re-parse
+        digest = hashlib.sha256(txt.encode()).hexdigest()
+        if digest != self.digest or self.df is None:
+            self.df = await asyncio.to_thread(parse_sheet, txt)
+            self.digest = digest
+            self.stats["parsed"] += 1
+        self.etag, self.last_modified = etag, last_modified
+        self.fetched_at = time.monotonic()
+        return self.df
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(timeout=ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        if self._inflight is not None:
+            self._inflight.cancel()
+        if self._session is not None:
+            await self._session.close()
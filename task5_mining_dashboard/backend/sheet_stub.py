@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from aiohttp import web
+from email.utils import formatdate
+
+# Local stand-in for the published Google Sheet CSV:
+#   python sheet_stub.py --days 3650 --mines 200 --port 8001
+#   SHEET_CSV_URL=http://127.0.0.1:8001/sheet.csv uvicorn app:app
+# GET /stats shows how many full and 304 responses were served.
+
+
+def make_sheet(days=365, mines=4, seed=0):
+    """Daily output per mine with some spikes and drops, as CSV text."""
+    rng = np.random.default_rng(seed)
+    base = rng.uniform(50, 500, mines)
+    values = base * (1 + 0.1 * rng.standard_normal((days, mines)))
+    spikes = rng.random((days, mines)) < 0.01
+    values[spikes] *= rng.choice([0.2, 3.0], spikes.sum())
+    df = pd.DataFrame(values.round(1), columns=[f"Mine {i + 1}" for i in range(mines)])
+    df.insert(0, "Date", pd.date_range("2015-01-01", periods=days, freq="D").strftime("%Y-%m-%d"))
+    return df.to_csv(index=False)
+
+
+class SheetStub:
+    def __init__(self, csv_text, validators=True, delay=0.0):
+        self.validators = validators
+        self.delay = delay
+        self.stats = {"requests": 0, "full": 0, "not_modified": 0}
+        self.set_csv(csv_text)
+
+    def set_csv(self, csv_text):
+        self.body = csv_text.encode()
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:16]
+        self.last_modified = formatdate(usegmt=True)
+
+    async def sheet(self, request):
+        self.stats["requests"] += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if not self.validators:
+            self.stats["full"] += 1
+            return web.Response(body=self.body, content_type="text/csv")
+        headers = {"ETag": self.etag, "Last-Modified": self.last_modified}
+        # If-None-Match takes precedence over If-Modified-Since (RFC 7232)
+        if "If-None-Match" in request.headers:
+            not_modified = request.headers["If-None-Match"] == self.etag
+        else:
+            not_modified = request.headers.get("If-Modified-Since") == self.last_modified
+        if not_modified:
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+        self.stats["full"] += 1
+        return web.Response(body=self.body, content_type="text/csv", headers=headers)
+
+    async def get_stats(self, request):
+        return web.json_response(self.stats)
+
+    def app(self):
+        app = web.Application()
+        app.router.add_get("/sheet.csv", self.sheet)
+        app.router.add_get("/stats", self.get_stats)
+        return app
+
+
+async def start_stub(stub, host="127.0.0.1", port=0):
+    """Run the stub on the current loop; returns (runner, url)."""
+    runner = web.AppRunner(stub.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://{host}:{port}/sheet.csv"
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Serve a synthetic mining sheet as CSV")
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--mines", type=int, default=4)
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--delay", type=float, default=0.0, help="seconds before each response")
+    ap.add_argument("--no-validators", action="store_true", help="send no ETag/Last-Modified")
+    args = ap.parse_args()
+
+    stub = SheetStub(make_sheet(args.days, args.mines), validators=not args.no_validators, delay=args.delay)
+    web.run_app(stub.app(), host="127.0.0.1", port=args.port)